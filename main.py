@@ -1,112 +1,71 @@
 from yannakakis.db import Database
-from yannakakis.yannakakis import Yannakakis
+from yannakakis.cache import RelationCache
+from yannakakis.engines import ENGINES, compare_engines
+from yannakakis.planner import referenced_columns
+from yannakakis.sqlparser import SqlQuery
 from yannakakis.jobdataset.JobQuery1A import JobQuery1A
 from yannakakis.jobdataset.JobQuery5C import JobQuery5C
 from yannakakis.jobdataset.JobQuery5B import JobQuery5B
 import logging
-import itertools
+import os
+import sys
 
+# Worker processes import this module again, the query only runs in the parent
+if __name__ == "__main__":
+    try:
 
-def generate_join_tree_permutations(join_tree):
-    """
-    Generate all permutations of the join tree, ensuring minimal connectivity.
-    
-    Args:
-    join_tree (list): List of dictionaries representing joins between tables
-    
-    Returns:
-    list: List of all join tree permutations
-    """
-    def is_valid_permutation(perm):
-        """
-        Check if a permutation maintains minimal table connections.
-        
-        Args:
-        perm (list): A permutation of join tree entries
-        
-        Returns:
-        bool: True if the permutation is valid, False otherwise
-        """
-        # Track unique tables in the permutation
-        all_tables = set()
-        for join in perm:
-            all_tables.add(join['left'])
-            all_tables.add(join['right'])
-        
-        # Check if we have at least one connection between joins
-        for i in range(len(perm) - 1):
-            for j in range(i + 1, len(perm)):
-                # If any two joins share a table, consider it a valid permutation
-                if (perm[i]['left'] == perm[j]['left'] or 
-                    perm[i]['left'] == perm[j]['right'] or 
-                    perm[i]['right'] == perm[j]['left'] or 
-                    perm[i]['right'] == perm[j]['right']):
-                    return True
-        
-        return False
+        # Clean the log file first 
+        with open("yannakakis.log", "w") as file:
+            pass 
 
-    # Generate all permutations
-    valid_permutations = []
-    for perm in itertools.permutations(join_tree):
-        # Convert permutation to list
-        perm_list = list(perm)
-        
-        # Check if this permutation has at least one table connection
-        if is_valid_permutation(perm_list):
-            valid_permutations.append(perm_list)
-    
-    return valid_permutations
+        # Set the log details
+        logging.basicConfig(
+            filename="yannakakis.log",
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        logger = logging.getLogger(__name__)
 
-try:
+        # Connect to the database and load the job dataset params
+        # Tables are snapshotted on the first run and memory-mapped afterwards
+        db = Database(snapshot_dir="snapshots")
+        # Any JOB query can be run from its SQL file: python main.py queries/1a.sql
+        if len(sys.argv) > 1:
+            with open(sys.argv[1]) as file:
+                job = SqlQuery(file.read())
+        else:
+            job = JobQuery5C()
 
-    # Clean the log file first 
-    with open("yannakakis.log", "w") as file:
-        pass 
+        # Run Yannakakis
+        logger.setLevel(logging.INFO)
+        # Let PostgreSQL evaluate the selections and only ship the needed columns
+        pushdown = True
+        columns = referenced_columns(job.columns, job.join_tree, job.selection_criteria, job.projection_criteria, include_selection=not pushdown)
+        # Every table is loaded once, statistics are collected while loading
+        cache = RelationCache(db, pushdown=pushdown)
+        # Relation name -> base table, for queries joining a table with itself
+        baseTables = getattr(job, "tables", None)
+        tables = cache.load(columns, job.selection_criteria, baseTables)
+        statistics = cache.load_statistics(columns, job.selection_criteria, baseTables)
 
-    # Set the log details
-    logging.basicConfig(
-        filename="yannakakis.log",
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    logger = logging.getLogger(__name__)
-
-    # Connect to the database and load the job dataset params
-    db = Database()
-    job = JobQuery5C()
-
-    # Run Yannakakis
-    logger.setLevel(logging.INFO)
-    permutations = generate_join_tree_permutations(job.join_tree)
-    minTime = float('inf')
-    bestCombination = job.join_tree
-    maxTime = float('-inf')
-    worstCombination = job.join_tree
-    for perm in permutations:
-        tables = {
-        table_name: db.fetch_table_from_db(table_name, columns, db.connection)
-        for table_name, columns in job.columns.items()
-        }
+        # The cost-based optimizer picks the root and join order
         logger.info("================================================================================================")
-        logger.info(f"Executing for join tree :-  {perm} ")
-        yannakakis = Yannakakis(tables, perm, job.selection_criteria, job.projection_criteria, logger, logging, False)
+        # Selections were already applied by the loader
+        options = {"statistics": statistics, "workers": os.cpu_count()} if job.engine == "yannakakis" else {}
+        run = ENGINES[job.engine](tables, job.join_tree, {}, job.projection_criteria, logger, logging, True, True, **options)
         logger.info("================================================================================================")
-        if minTime > yannakakis.timeTaken:
-            minTime = yannakakis.timeTaken
-            bestCombination = perm
-        
-        if maxTime < yannakakis.timeTaken:
-            maxTime = yannakakis.timeTaken
-            worstCombination = perm
-    
-    logger.info(f"overall best combination was : {bestCombination}")
-    logger.info(f"overall best time taken was: {minTime}")
 
-    logger.info(f"overall worst combination was : {worstCombination}")
-    logger.info(f"overall worst time taken was: {maxTime}")
+        logger.info(f"Result : {run.result}")
+        logger.info(f"Time taken was: {run.timeTaken}")
+        # Per-phase and per-edge timings, cardinalities and memory, to track regressions
+        run.profiler.to_json("profile.json")
+
+        # Head-to-head comparison of the engines on the same relations
+        for engine, report in compare_engines(tables, job.join_tree, {}, job.projection_criteria, logger, logging).items():
+            logger.info(f"Engine {engine} :- time {report['time']:.6f} seconds, result {report['result']}")
 
-except Exception as e:
-    logger.setLevel(logging.ERROR)
-    logger.error(f"Error occurred :  {e}")
-finally:
-    db.closeConnection()
+    except Exception as e:
+        logger.setLevel(logging.ERROR)
+        logger.error(f"Error occurred :  {e}")
+    finally:
+        db.closeConnection()
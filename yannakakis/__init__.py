@@ -1,2 +1,10 @@
 from .db import Database
 from .yannakakis import Yannakakis
+from .incremental import IncrementalYannakakis
+from .relation import ColumnarRelation
+from .planner import CyclicQueryError, build_join_tree
+from .cache import RelationCache
+from .optimizer import JoinOrderOptimizer
+from .wcoj import GenericJoin
+from .sqlparser import SqlQuery, SqlSyntaxError, parse_query
+from .service import QueryService
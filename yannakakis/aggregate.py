@@ -0,0 +1,135 @@
+import numpy as np
+from .encoding import encode_join_keys
+from .index import KeyIndex
+from .relation import as_columnar, notna_mask
+
+AGGREGATE_FUNCTIONS = ("MIN", "MAX")
+
+
+def is_aggregate(spec):
+    return spec.startswith(tuple(f"{func}(" for func in AGGREGATE_FUNCTIONS)) and spec.endswith(")")
+
+
+def parse_aggregates(projection_criteria):
+    """
+    Extract the MIN/MAX aggregates of a projection.
+
+    Args:
+        projection_criteria: Dictionary table -> list of `MIN(col)` / `MAX(col)` specs.
+
+    Returns:
+        A list of (label, function, table, column) tuples, labelled `MIN(table.col)`.
+    """
+    aggregates = []
+    for table, specs in projection_criteria.items():
+        for spec in specs:
+            func, column = spec[:3], spec[4:-1]
+            aggregates.append((f"{func}({table}.{column})", func, table, column))
+    return aggregates
+
+
+def projected_columns(projection_criteria):
+    """
+    Columns a projection reads, aggregated ones included.
+
+    Returns:
+        A dictionary table -> list of column names.
+    """
+    return {
+        table: list(dict.fromkeys(spec[4:-1] if is_aggregate(spec) else spec for spec in specs))
+        for table, specs in projection_criteria.items()
+    }
+
+
+def is_aggregate_query(projection_criteria):
+    """
+    True when the projection only holds aggregates (an empty one means COUNT(*)).
+    """
+    return all(is_aggregate(spec) for specs in projection_criteria.values() for spec in specs)
+
+
+def combine(func, current, value):
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return min(current, value) if func == "MIN" else max(current, value)
+
+
+def group_extreme(func, values, weights, order, starts):
+    """
+    MIN or MAX of `values` per key group, ignoring NULLs and rows with zero weight.
+    """
+    result = np.empty(len(starts), dtype=object)
+    result[:] = None
+    group_ids = np.zeros(len(order), dtype=np.int64)
+    group_ids[starts[1:]] = 1
+    group_ids = np.cumsum(group_ids)
+    sorted_values = values[order]
+    alive = np.flatnonzero((weights[order] > 0) & notna_mask(sorted_values))
+    for group, value in zip(group_ids[alive].tolist(), sorted_values[alive].tolist()):
+        result[group] = combine(func, result[group], value)
+    return result
+
+
+def aggregate_phase(reduced, join_tree, projection_criteria, indexes=None):
+    """
+    Compute COUNT(*) and the MIN/MAX aggregates of the join without materializing it.
+
+    Every row carries the number of join results it takes part in within its
+    subtree, together with the partial MIN/MAX of the aggregated columns of that
+    subtree. Walking the tree bottom-up, a child is grouped by its join key and
+    its per-key counts and partial aggregates are folded into the parent rows.
+    The root then holds the totals. Runs in time linear in the relation sizes.
+
+    Args:
+        reduced: Dictionary table -> relation (list of dicts or ColumnarRelation).
+        join_tree: Rooted join tree in top-down order (see planner.build_join_tree).
+        projection_criteria: Dictionary table -> list of `MIN(col)` / `MAX(col)` specs.
+        indexes: Optional IndexRegistry whose key indexes are reused instead of built per edge.
+
+    Returns:
+        A single-row result, e.g. [{"COUNT(*)": 42, "MIN(title.title)": "..."}].
+    """
+    aggregates = parse_aggregates(projection_criteria)
+    tables = [join_tree[0]["left"]] + [edge["right"] for edge in join_tree] if join_tree else list(reduced)
+    if any(len(reduced[table]) == 0 for table in tables):
+        return [{"COUNT(*)": 0, **{label: None for label, _, _, _ in aggregates}}]
+    relations = {table: as_columnar(reduced[table]) for table in tables}
+    # Relations given as lists reach here with raw keys: NULL keys are dropped and
+    # object keys factorized, as the columnar path already did after the selections
+    key_columns = [(edge[side], edge[f"{side}_key"]) for edge in join_tree for side in ("left", "right")]
+    if any(relations[table][column].dtype.kind not in "iu" for table, column in key_columns):
+        relations = encode_join_keys(relations, join_tree)
+
+    weights = {table: np.ones(len(relations[table]), dtype=np.int64) for table in tables}
+    partials = {table: {} for table in tables}
+    for label, func, table, column in aggregates:
+        partials[table][label] = (func, relations[table].decoded(column))
+
+    for edge in reversed(join_tree):
+        parent, child = edge["left"], edge["right"]
+        index = indexes.get(child, edge["right_key"], relations[child]) if indexes is not None else None
+        if index is None:
+            index = KeyIndex.build(relations[child][edge["right_key"]])
+        order, starts = index.order, index.starts
+        counts = np.add.reduceat(weights[child][order], starts) if len(starts) else np.empty(0, dtype=np.int64)
+        positions, found = index.lookup(relations[parent][edge["left_key"]])
+
+        weights[parent] = weights[parent] * np.where(found, counts[positions] if len(counts) else 0, 0)
+        for label, (func, values) in partials[child].items():
+            groups = group_extreme(func, values, weights[child], order, starts)
+            folded = np.empty(len(positions), dtype=object)
+            folded[:] = None
+            folded[found] = groups[positions[found]]
+            partials[parent][label] = (func, folded)
+
+    root = tables[0]
+    result = {"COUNT(*)": int(weights[root].sum())}
+    alive = weights[root] > 0
+    for label, (func, values) in partials[root].items():
+        value = None
+        for v in values[alive & notna_mask(values)].tolist():
+            value = combine(func, value, v)
+        result[label] = value
+    return [result]
@@ -0,0 +1,2 @@
+from .generator import generate_imdb
+from .runner import ENGINE_MODES, format_table, job_queries, run_benchmark, summarize
@@ -0,0 +1,51 @@
+import argparse
+import sys
+from .runner import ENGINE_MODES, check_results, format_table, job_queries, run_benchmark, summarize, write_csv, write_json
+
+
+def main(argv=None):
+    """
+    Command line entry point: python -m yannakakis.benchmark --scale 0.1 1 --repetitions 3
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m yannakakis.benchmark",
+        description="Run the jobdataset queries in every engine mode over synthetic IMDB-shaped data."
+    )
+    parser.add_argument("--queries", nargs="+", choices=list(job_queries()), help="queries to run, all by default")
+    parser.add_argument("--modes", nargs="+", choices=list(ENGINE_MODES), help="engine modes to run, all by default")
+    parser.add_argument("--scale", nargs="+", type=float, default=[0.1, 0.5, 1.0], help="scale factors")
+    parser.add_argument("--repetitions", type=int, default=3, help="runs per query, mode and scale factor")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data generator")
+    parser.add_argument("--json", help="write the settings, summary and every measurement to this file")
+    parser.add_argument("--csv", help="write the summary table to this file")
+    parser.add_argument("--trace-memory", action="store_true", help="record the tracemalloc peak of every run (slower)")
+    parser.add_argument("--quiet", action="store_true", help="do not print a line per run")
+    args = parser.parse_args(argv)
+
+    def progress(measurement):
+        print(
+            f"{measurement['query']:>4} {measurement['mode']:<20} sf={measurement['scale_factor']:g} "
+            f"#{measurement['repetition']} {measurement['time']:.6f} s",
+            file=sys.stderr
+        )
+
+    measurements = run_benchmark(
+        args.queries, args.modes, args.scale, args.repetitions, args.seed,
+        progress=None if args.quiet else progress, traceMemory=args.trace_memory
+    )
+    summary = summarize(measurements)
+    print(format_table(summary))
+
+    if args.json:
+        write_json(measurements, summary, args.json, scale_factors=args.scale, repetitions=args.repetitions, seed=args.seed, trace_memory=args.trace_memory)
+    if args.csv:
+        write_csv(summary, args.csv)
+
+    mismatches = check_results(summary)
+    for (query, scale_factor), results in mismatches.items():
+        print(f"Result mismatch for {query} at scale factor {scale_factor:g}: {results}", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
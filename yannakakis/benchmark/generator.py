@@ -0,0 +1,239 @@
+import numpy as np
+from ..relation import ColumnarRelation, to_column
+
+# Rows of every table at scale factor 1, about 1% of the real IMDB snapshot used by JOB
+BASE_ROWS = {
+    "title": 25000,
+    "movie_companies": 26000,
+    "movie_info": 148000,
+    "movie_info_idx": 13800,
+}
+
+# Companies referenced by movie_companies at scale factor 1
+BASE_COMPANIES = 2350
+
+COMPANY_TYPES = ["distributors", "production companies", "special effects companies", "miscellaneous companies"]
+COMPANY_TYPE_WEIGHTS = [0.51, 0.45, 0.01, 0.03]
+
+# The 113 info types of IMDB, in id order
+INFO_TYPES = [
+    "runtimes", "color info", "genres", "languages", "certificates", "sound mix", "tech info",
+    "countries", "taglines", "keywords", "alternate versions", "crazy credits", "goofs",
+    "soundtrack", "quotes", "release dates", "trivia", "locations", "mini biography",
+    "birth notes", "birth date", "height", "death date", "spouse", "other works",
+    "birth name", "salary history", "nick names", "books", "agent address", "biographical movies",
+    "portrayed in", "where now", "trade mark", "interviews", "article", "magazine cover photo",
+    "pictorial", "death notes", "LD disc format", "LD year", "LD digital sound",
+    "LD official retail price", "LD frequency response", "LD pressing plant", "LD length",
+    "LD language", "LD review", "LD spaciality", "LD release date", "LD production country",
+    "LD contrast", "LD color rendition", "LD picture format", "LD video noise",
+    "LD video artifacts", "LD release country", "LD sharpness", "LD dynamic range",
+    "LD audio noise", "LD color information", "LD group genre", "LD quality program",
+    "LD close captions-teletext-ld-g", "LD category", "LD analog left", "LD certification",
+    "LD audio quality", "LD video quality", "LD aspect ratio", "LD analog right",
+    "LD additional information", "LD number of chapter stops", "LD dialogue intellegibility",
+    "LD disc size", "LD master format", "LD subtitles", "LD status of availablility",
+    "LD quality of source", "LD number of sides", "LD video standard", "LD supplement",
+    "LD original title", "LD sound encoding", "LD number", "LD label", "LD catalog number",
+    "LD laserdisc title", "screenplay-teleplay", "novel", "adaption", "book", "production process protocol",
+    "printed media reviews", "essays", "other literature", "mpaa", "plot", "votes distribution",
+    "votes", "rating", "production dates", "copyright holder", "filming dates", "budget",
+    "weekend gross", "gross", "opening weekend", "rentals", "admissions", "studios",
+    "top 250 rank", "bottom 10 rank",
+]
+
+# movie_info rows mostly describe a handful of info types
+MOVIE_INFO_TYPES = ["release dates", "genres", "languages", "countries", "runtimes", "certificates",
+                    "color info", "sound mix", "locations", "plot", "budget", "taglines"]
+MOVIE_INFO_VALUES = {
+    "release dates": ["USA:2012", "UK:2011", "Germany:2008", "France:1999", "Japan:1995", "USA:1987"],
+    "genres": ["Drama", "Comedy", "Documentary", "Short", "Horror", "Thriller", "Action", "Romance"],
+    "languages": ["English", "French", "German", "Spanish", "Japanese", "Italian"],
+    "countries": ["USA", "UK", "Germany", "France", "Japan", "Italy", "Sweden", "Denmark"],
+    "runtimes": ["90", "100", "85", "120", "60", "30"],
+    "certificates": ["USA:R", "USA:PG-13", "UK:15", "Germany:12"],
+}
+MOVIE_INFO_NOTES = [None, "(USA)", "(worldwide)", "(theatrical)", "(premiere)"]
+MOVIE_INFO_NOTE_WEIGHTS = [0.8, 0.08, 0.05, 0.05, 0.02]
+
+# movie_info_idx only holds ratings; the ranking info types are very selective
+MOVIE_INFO_IDX_TYPES = ["votes distribution", "votes", "rating", "top 250 rank", "bottom 10 rank"]
+MOVIE_INFO_IDX_WEIGHTS = [0.33, 0.33, 0.33, 0.008, 0.002]
+
+MOVIE_COMPANY_NOTES = [
+    None, "(USA)", "(worldwide)", "(TV)", "(USA) (TV)", "(theatrical)", "(co-production)",
+    "(presents)", "(as Metro-Goldwyn-Mayer Pictures)", "(2006) (USA) (TV)", "(USA) (theatrical)",
+    "(co-production) (USA)", "(Germany)", "(UK)", "(VHS)", "(DVD)",
+]
+MOVIE_COMPANY_NOTE_WEIGHTS = [0.35, 0.12, 0.08, 0.07, 0.06, 0.06, 0.04, 0.04, 0.01, 0.02, 0.03, 0.02, 0.03, 0.03, 0.02, 0.02]
+
+KIND_WEIGHTS = [0.35, 0.02, 0.05, 0.03, 0.02, 0.05, 0.48]
+
+
+def scaled_rows(table, scale_factor):
+    return max(int(round(BASE_ROWS[table] * scale_factor)), 1)
+
+
+def zipf_choice(rng, n, size, exponent):
+    """
+    Draw `size` ranks in [0, n) with P(rank i) proportional to 1 / (i + 1) ** exponent.
+    """
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def weighted_choice(rng, values, weights, size):
+    """
+    Draw `size` values of `values` (None allowed) with the given relative weights, as an object column.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    choices = to_column(list(values))
+    if choices.dtype.kind != "O":
+        choices = choices.astype(object)
+    return choices[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def with_nulls(rng, values, null_fraction):
+    """
+    Object column holding `values` with about `null_fraction` of them replaced by NULL.
+    """
+    column = np.asarray(values).astype(object)
+    column[rng.random(len(column)) < null_fraction] = None
+    return column
+
+
+def strings(prefix, numbers):
+    return to_column([f"{prefix}{n}" for n in numbers.tolist()])
+
+
+def foreign_keys(rng, popularity, size, exponent):
+    """
+    Zipfian foreign keys: `popularity` holds the referenced ids from most to
+    least popular, so a few ids are referenced very often and most rarely or never.
+    """
+    return popularity[zipf_choice(rng, len(popularity), size, exponent)]
+
+
+def generate_title(rng, rows):
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+    # Production years lean towards recent decades, a few are unknown
+    years = np.arange(1880, 2020)
+    recency = np.exp((years - years[-1]) / 25.0)
+    years = years[rng.choice(len(years), size=rows, p=recency / recency.sum())]
+    kinds = rng.choice(len(KIND_WEIGHTS), size=rows, p=KIND_WEIGHTS) + 1
+    # Kind 7 is an episode, the only kind with a series and episode numbers
+    episodes = kinds == 7
+
+    def episode_column(values):
+        column = values.astype(object)
+        column[~episodes] = None
+        return column
+
+    return ColumnarRelation({
+        "id": ids,
+        "title": strings("Title #", rng.integers(0, rows * 4, size=rows)),
+        "imdb_index": with_nulls(rng, weighted_choice(rng, ["I", "II", "III"], [0.8, 0.15, 0.05], rows), 0.97),
+        "kind_id": kinds.astype(np.int64),
+        "production_year": with_nulls(rng, years, 0.05),
+        "imdb_id": to_column([None] * rows),
+        "phonetic_code": with_nulls(rng, strings("P", rng.integers(0, 5000, size=rows)), 0.1),
+        "episode_of_id": episode_column(rng.integers(1, rows + 1, size=rows)),
+        "season_nr": episode_column(rng.integers(1, 20, size=rows)),
+        "episode_nr": episode_column(rng.integers(1, 300, size=rows)),
+        "series_years": with_nulls(rng, weighted_choice(rng, ["1990-1995", "2000-2008", "2010-????"], [1, 1, 1], rows), 0.9),
+        "md5sum": to_column([f"{value:032x}" for value in rng.integers(0, 2 ** 62, size=rows).tolist()]),
+    })
+
+
+def generate_movie_companies(rng, rows, movies, company_types, companies, skew):
+    return ColumnarRelation({
+        "id": np.arange(1, rows + 1, dtype=np.int64),
+        "movie_id": foreign_keys(rng, movies, rows, skew),
+        "company_id": foreign_keys(rng, rng.permutation(np.arange(1, companies + 1, dtype=np.int64)), rows, skew),
+        "company_type_id": company_types[rng.choice(len(company_types), size=rows, p=COMPANY_TYPE_WEIGHTS)],
+        "note": weighted_choice(rng, MOVIE_COMPANY_NOTES, MOVIE_COMPANY_NOTE_WEIGHTS, rows),
+    })
+
+
+def generate_movie_info(rng, rows, movies, info_ids, skew):
+    type_ranks = zipf_choice(rng, len(MOVIE_INFO_TYPES), rows, 1.0)
+    info_type_ids = np.array([info_ids[name] for name in MOVIE_INFO_TYPES], dtype=np.int64)[type_ranks]
+    info = np.empty(rows, dtype=object)
+    for rank, name in enumerate(MOVIE_INFO_TYPES):
+        rows_of_type = np.flatnonzero(type_ranks == rank)
+        values = MOVIE_INFO_VALUES.get(name, [f"{name} {n}" for n in range(50)])
+        info[rows_of_type] = weighted_choice(rng, values, [1.0] * len(values), len(rows_of_type))
+    return ColumnarRelation({
+        "id": np.arange(1, rows + 1, dtype=np.int64),
+        "movie_id": foreign_keys(rng, movies, rows, skew),
+        "info_type_id": info_type_ids,
+        "info": info,
+        "note": weighted_choice(rng, MOVIE_INFO_NOTES, MOVIE_INFO_NOTE_WEIGHTS, rows),
+    })
+
+
+def generate_movie_info_idx(rng, rows, movies, info_ids, skew):
+    types = rng.choice(len(MOVIE_INFO_IDX_TYPES), size=rows, p=MOVIE_INFO_IDX_WEIGHTS)
+    ratings = rng.integers(10, 100, size=rows) / 10.0
+    movie_ids = foreign_keys(rng, movies, rows, skew)
+    # Ranked movies are the popular ones, with many companies and infos, as in IMDB
+    ranked = np.flatnonzero(np.isin(types, [MOVIE_INFO_IDX_TYPES.index("top 250 rank"), MOVIE_INFO_IDX_TYPES.index("bottom 10 rank")]))
+    head = max(len(movies) // 50, 1)
+    movie_ids[ranked] = movies[rng.integers(0, head, size=len(ranked))]
+    return ColumnarRelation({
+        "id": np.arange(1, rows + 1, dtype=np.int64),
+        "movie_id": movie_ids,
+        "info_type_id": np.array([info_ids[name] for name in MOVIE_INFO_IDX_TYPES], dtype=np.int64)[types],
+        "info": to_column([f"{r:.1f}" for r in ratings.tolist()]),
+        "note": to_column([None] * rows),
+    })
+
+
+def generate_imdb(scale_factor=1.0, seed=0, skew=1.1):
+    """
+    Generate a synthetic database shaped like the IMDB snapshot of the Join Order Benchmark.
+
+    The tables have the columns of the `jobdataset` queries. Fact tables
+    (movie_companies, movie_info, movie_info_idx) reference titles with a
+    Zipfian fan-out, so a few movies own most rows, while the company_type and
+    info_type dimensions keep their real, fixed sizes and the skewed value
+    frequencies that make the JOB selections selective. Strings come in the
+    same shapes as in IMDB, e.g. `(co-production) (USA)` notes, so LIKE
+    predicates behave alike. The same arguments always give the same data.
+
+    Args:
+        scale_factor: Multiplier of the fact table sizes; 1.0 is about 1% of IMDB.
+        seed: Seed of the random generator.
+        skew: Zipf exponent of the foreign key fan-out.
+
+    Returns:
+        A dictionary table -> dictionary-encoded ColumnarRelation.
+    """
+    if scale_factor <= 0:
+        raise ValueError(f"scale_factor must be positive, got {scale_factor}")
+    rng = np.random.default_rng(seed)
+
+    company_types = np.arange(1, len(COMPANY_TYPES) + 1, dtype=np.int64)
+    info_ids = {name: i + 1 for i, name in enumerate(INFO_TYPES)}
+    title = generate_title(rng, scaled_rows("title", scale_factor))
+    companies = max(int(round(BASE_COMPANIES * scale_factor)), 1)
+    # One popularity order shared by the fact tables, so popular movies are popular everywhere
+    movies = rng.permutation(title["id"])
+
+    tables = {
+        "company_type": ColumnarRelation({"id": company_types, "kind": to_column(COMPANY_TYPES)}),
+        "info_type": ColumnarRelation({
+            "id": np.arange(1, len(INFO_TYPES) + 1, dtype=np.int64),
+            "info": to_column(INFO_TYPES),
+        }),
+        "title": title,
+        "movie_companies": generate_movie_companies(
+            rng, scaled_rows("movie_companies", scale_factor), movies, company_types, companies, skew
+        ),
+        "movie_info": generate_movie_info(rng, scaled_rows("movie_info", scale_factor), movies, info_ids, skew),
+        "movie_info_idx": generate_movie_info_idx(
+            rng, scaled_rows("movie_info_idx", scale_factor), movies, info_ids, skew
+        ),
+    }
+    # Same layout as the relations handed out by RelationCache
+    return {name: relation.encode() for name, relation in tables.items()}
@@ -0,0 +1,222 @@
+import csv
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import statistics as stats
+from .. import jobdataset
+from ..engines import ENGINES
+from ..planner import referenced_columns
+from ..stats import collect_statistics
+from .generator import generate_imdb
+
+# Engine modes: (engine name, applyAggregatePushdown, extra constructor options)
+ENGINE_MODES = {
+    "yannakakis": ("yannakakis", True, {}),
+    "yannakakis_join": ("yannakakis", False, {}),
+    "yannakakis_bloom": ("yannakakis", True, {"applyBloomFilter": True}),
+    "yannakakis_parallel": ("yannakakis", True, {"workers": os.cpu_count()}),
+    "generic_join": ("generic_join", True, {}),
+}
+
+# Columns of the summary table, see format_table
+SUMMARY_COLUMNS = ["query", "mode", "scale_factor", "runs", "median_s", "min_s", "cpu_s", "relations_kb", "traced_kb", "result"]
+COLUMN_FORMATS = {"scale_factor": "g", "median_s": ".6f", "min_s": ".6f", "cpu_s": ".6f", "relations_kb": ".1f", "traced_kb": ".1f"}
+
+
+def job_queries():
+    """
+    Every query definition of the `jobdataset` package.
+
+    Returns:
+        A dictionary name (e.g. `1A`) -> query instance, in name order.
+    """
+    queries = {}
+    for module in pkgutil.iter_modules(jobdataset.__path__):
+        if not module.name.startswith("JobQuery"):
+            continue
+        definition = getattr(importlib.import_module(f"{jobdataset.__name__}.{module.name}"), module.name)
+        queries[module.name[len("JobQuery"):]] = definition()
+    return dict(sorted(queries.items()))
+
+
+def query_relations(database, job):
+    """
+    The relations and base statistics of one query, as RelationCache.load hands them out.
+    """
+    columns = referenced_columns(job.columns, job.join_tree, job.selection_criteria, job.projection_criteria)
+    tables = getattr(job, "tables", None) or {}
+    relations, statistics = {}, {}
+    for table, column_names in columns.items():
+        base = database[tables.get(table, table)]
+        relations[table] = base.project(column_names)
+        statistics[table] = collect_statistics(relations[table].decode())
+        relations[table] = relations[table].readonly()
+    return relations, statistics
+
+
+def relations_memory(profiler):
+    """
+    Largest memory of the relations over the phases of a run, in bytes (see Profiler.record_memory).
+    """
+    totals = {}
+    for entry in profiler.memory:
+        totals[entry["phase"]] = totals.get(entry["phase"], 0) + entry["bytes"]
+    return max(totals.values(), default=0)
+
+
+def traced_memory(profiler):
+    """
+    Peak of the memory allocated by a run, in bytes, or None when it was not traced.
+    """
+    peaks = [phase["peak_bytes"] for phase in profiler.phases if "peak_bytes" in phase]
+    return max(peaks) if peaks else None
+
+
+def result_summary(result):
+    """
+    A short comparable form of a query result: the row of an aggregate query, or a row count.
+    """
+    if len(result) == 1 and "COUNT(*)" in result[0]:
+        return result[0]["COUNT(*)"]
+    return len(result)
+
+
+def run_query(relations, statistics, job, mode, logger, traceMemory=False):
+    """
+    Run one query in one engine mode.
+
+    Returns:
+        A dictionary with the run's wall and CPU seconds, memory, result
+        summary and profile report.
+    """
+    engine, aggregatePushdown, options = ENGINE_MODES[mode]
+    if engine == "yannakakis":
+        options = {"statistics": statistics, **options}
+    run = ENGINES[engine](
+        relations, job.join_tree, job.selection_criteria, job.projection_criteria,
+        logger, logging, True, aggregatePushdown, traceMemory=traceMemory, **options
+    )
+    return {
+        "time": run.timeTaken,
+        "cpu": run.profiler.total.get("cpu"),
+        "relations_bytes": relations_memory(run.profiler),
+        "traced_bytes": traced_memory(run.profiler),
+        "result": result_summary(run.result),
+        "profile": run.profiler.report(),
+    }
+
+
+def run_benchmark(queries=None, modes=None, scale_factors=(0.1, 0.5, 1.0), repetitions=3, seed=0, logger=None, progress=None, traceMemory=False):
+    """
+    Run every query in every engine mode over synthetic databases of several sizes.
+
+    Each scale factor gets one database from `generate_imdb(scale_factor, seed)`,
+    shared by all runs on it, so the measurements are reproducible and
+    comparable between modes and between commits.
+
+    Args:
+        queries: Names of the jobdataset queries to run (e.g. `["1A", "5C"]`); all by default.
+        modes: Names of ENGINE_MODES to run; all by default.
+        scale_factors: Database sizes, see generate_imdb.
+        repetitions: Runs of every (query, mode, scale factor).
+        seed: Seed of the data generator.
+        logger: Logger handed to the engines; a silent one by default.
+        progress: Optional callable receiving every measurement as it is taken.
+        traceMemory: Also record the tracemalloc peak of every run, which slows the runs down.
+
+    Returns:
+        A list of measurements, one per run, without the profile reports.
+    """
+    available = job_queries()
+    queries = list(queries or available)
+    modes = list(modes or ENGINE_MODES)
+    unknown = [name for name in queries if name not in available] + [name for name in modes if name not in ENGINE_MODES]
+    if unknown:
+        raise ValueError(f"Unknown queries or engine modes: {unknown}")
+    if logger is None:
+        logger = logging.getLogger(f"{__name__}.engines")
+        logger.setLevel(logging.WARNING)
+
+    measurements = []
+    for scale_factor in scale_factors:
+        database = generate_imdb(scale_factor, seed)
+        for name in queries:
+            job = available[name]
+            relations, statistics = query_relations(database, job)
+            for mode in modes:
+                for repetition in range(repetitions):
+                    report = run_query(relations, statistics, job, mode, logger, traceMemory)
+                    report.pop("profile")
+                    measurement = {"query": name, "mode": mode, "scale_factor": scale_factor, "repetition": repetition, **report}
+                    measurements.append(measurement)
+                    if progress is not None:
+                        progress(measurement)
+    return measurements
+
+
+def summarize(measurements):
+    """
+    Collapse the repetitions of every (query, mode, scale factor) into one row.
+
+    Returns:
+        A list of dictionaries with the SUMMARY_COLUMNS keys.
+    """
+    groups = {}
+    for measurement in measurements:
+        key = (measurement["query"], measurement["mode"], measurement["scale_factor"])
+        groups.setdefault(key, []).append(measurement)
+    summary = []
+    for (query, mode, scale_factor), runs in groups.items():
+        times = [run["time"] for run in runs]
+        results = {repr(run["result"]) for run in runs}
+        summary.append({
+            "query": query,
+            "mode": mode,
+            "scale_factor": scale_factor,
+            "runs": len(runs),
+            "median_s": stats.median(times),
+            "min_s": min(times),
+            "cpu_s": stats.median(run["cpu"] for run in runs),
+            "relations_kb": max(run["relations_bytes"] for run in runs) / 1024,
+            "traced_kb": max(run["traced_bytes"] for run in runs) / 1024 if runs[0]["traced_bytes"] is not None else None,
+            "result": runs[0]["result"] if len(results) == 1 else "varies",
+        })
+    return summary
+
+
+def check_results(summary):
+    """
+    Find the (query, scale factor) pairs whose engine modes disagree on the result.
+    """
+    results = {}
+    for row in summary:
+        results.setdefault((row["query"], row["scale_factor"]), {})[row["mode"]] = row["result"]
+    return {key: modes for key, modes in results.items() if len({repr(r) for r in modes.values()}) > 1}
+
+
+def format_table(summary):
+    """
+    Render the summary as a fixed-width text table.
+    """
+    def cell(column, value):
+        return format(value, COLUMN_FORMATS[column]) if column in COLUMN_FORMATS and value is not None else str(value)
+
+    rows = [SUMMARY_COLUMNS] + [[cell(column, row[column]) for column in SUMMARY_COLUMNS] for row in summary]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(SUMMARY_COLUMNS))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]) if rows else SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(measurements, summary, path, **settings):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"settings": settings, "summary": summary, "measurements": measurements}, file, indent=2, default=str)
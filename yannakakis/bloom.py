@@ -0,0 +1,89 @@
+import math
+import numpy as np
+
+# One block is a 512 bit cache line of eight 64 bit words
+BLOCK_WORDS = 8
+BLOCK_BITS = BLOCK_WORDS * 64
+
+
+def mix64(keys, seed):
+    """
+    splitmix64 finalizer over integer keys, wrapping in uint64 arithmetic.
+    """
+    with np.errstate(over="ignore"):
+        h = keys.astype(np.uint64) + np.uint64(seed)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+
+
+class BlockedBloomFilter():
+    """
+    Blocked Bloom filter over integer keys.
+
+    A key hashes to one 512 bit block and sets its `hashes` bits inside that
+    block only, so a probe touches a single cache line. Membership tests have
+    no false negatives and a false-positive rate close to the configured one.
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.01):
+        """
+        Args:
+            capacity: Expected number of distinct keys.
+            false_positive_rate: Target probability that an absent key passes.
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"false_positive_rate must be in (0, 1), got {false_positive_rate}")
+        capacity = max(int(capacity), 1)
+        bits = -capacity * math.log(false_positive_rate) / math.log(2) ** 2
+        self.blocks = max(int(math.ceil(bits / BLOCK_BITS)), 1)
+        self.hashes = min(max(int(round(self.blocks * BLOCK_BITS / capacity * math.log(2))), 1), 16)
+        self.false_positive_rate = false_positive_rate
+        self.words = np.zeros(self.blocks * BLOCK_WORDS, dtype=np.uint64)
+
+    @classmethod
+    def build(cls, keys, false_positive_rate=0.01, capacity=None):
+        """
+        Filter holding every key of a key column.
+
+        Args:
+            capacity: Expected number of distinct keys, e.g. from column statistics.
+                Defaults to the number of keys, which never undersizes the filter.
+        """
+        bloom = cls(min(capacity, len(keys)) if capacity else len(keys), false_positive_rate)
+        bloom.add(keys)
+        return bloom
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def positions(self, keys):
+        """
+        Word index and bit mask of every (key, hash function) pair, one row per hash function.
+        """
+        block = mix64(keys, 0) % np.uint64(self.blocks)
+        h1, h2 = mix64(keys, 0x9E3779B97F4A7C15), mix64(keys, 0x632BE59BD9B4E019) | np.uint64(1)
+        words, masks = [], []
+        with np.errstate(over="ignore"):
+            for i in range(self.hashes):
+                bit = (h1 + np.uint64(i) * h2) % np.uint64(BLOCK_BITS)
+                words.append((block * np.uint64(BLOCK_WORDS) + (bit >> np.uint64(6))).astype(np.int64))
+                masks.append(np.left_shift(np.uint64(1), bit & np.uint64(63)))
+        return words, masks
+
+    def add(self, keys):
+        words, masks = self.positions(np.asarray(keys))
+        for word, mask in zip(words, masks):
+            # Unbuffered OR, plain fancy-index assignment would drop repeated words
+            np.bitwise_or.at(self.words, word, mask)
+
+    def contains(self, keys):
+        """
+        Mask of the keys that may be in the filter.
+        """
+        words, masks = self.positions(np.asarray(keys))
+        found = np.ones(len(keys), dtype=bool)
+        for word, mask in zip(words, masks):
+            found &= (self.words[word] & mask) != 0
+        return found
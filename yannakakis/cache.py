@@ -0,0 +1,95 @@
+from .stats import collect_statistics
+
+
+def freeze(value):
+    """
+    Turn condition values (lists, tuples, sets, nested conditions) into something hashable.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return tuple((key, freeze(v)) for key, v in sorted(value.items()))
+    return value
+
+
+class RelationCache():
+    """
+    Store of loaded base tables, keyed by (table, columns, pushed-down predicates).
+
+    Every table is read from the database once, kept as a ColumnarRelation and
+    handed out as a read-only view, so many plans can be run after a single load.
+    Column statistics for the optimizer are collected as the tables are loaded.
+    """
+
+    def __init__(self, database, pushdown=False, batch_size=50000, collectStatistics=True):
+        self.database = database
+        self.pushdown = pushdown
+        self.batch_size = batch_size
+        self.collectStatistics = collectStatistics
+        self.tables = {}
+        self.statistics = {}
+
+    def key(self, table_name, column_names, conditions):
+        frozen = tuple((c["column"], c["operator"], freeze(c["value"])) for c in conditions or [])
+        return (table_name, tuple(column_names), frozen, self.pushdown)
+
+    def get(self, table_name, column_names, conditions=None):
+        """
+        Return a read-only view of the table, loading it on the first request.
+        """
+        key = self.key(table_name, column_names, conditions)
+        if key not in self.tables:
+            self.tables[key] = self.database.fetch_table_from_db(
+                table_name,
+                list(column_names),
+                None,
+                conditions,
+                columnar=True,
+                batch_size=self.batch_size,
+                pushdown=self.pushdown
+            )
+            if self.collectStatistics:
+                self.statistics[key] = collect_statistics(self.tables[key])
+            # String columns are kept dictionary-encoded, decoded only in query results
+            self.tables[key] = self.tables[key].encode()
+        return self.tables[key].readonly()
+
+    def load(self, columns, selection_criteria, tables=None):
+        """
+        Fetch every table of a query definition.
+
+        Args:
+            columns: Dictionary table -> columns to load.
+            selection_criteria: Dictionary table -> conditions applied while loading.
+            tables: Optional dictionary relation name -> base table, for queries
+                that use the same table under several aliases.
+
+        Returns:
+            A dictionary table -> read-only ColumnarRelation.
+        """
+        tables = tables or {}
+        return {
+            table_name: self.get(tables.get(table_name, table_name), column_names, selection_criteria.get(table_name))
+            for table_name, column_names in columns.items()
+        }
+
+    def load_statistics(self, columns, selection_criteria, tables=None):
+        """
+        Column statistics of the tables returned by `load` for the same arguments.
+
+        Returns:
+            A dictionary table -> {column: ColumnStatistics}.
+        """
+        tables = tables or {}
+        statistics = {}
+        for table_name, column_names in columns.items():
+            key = self.key(tables.get(table_name, table_name), column_names, selection_criteria.get(table_name))
+            if key in self.statistics:
+                statistics[table_name] = self.statistics[key]
+        return statistics
+
+    def clear(self):
+        self.tables = {}
+        self.statistics = {}
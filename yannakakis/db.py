@@ -1,28 +1,98 @@
 import psycopg2
+from .pushdown import compile_conditions
+from .relation import ColumnarRelation
+from .selection import compile_selection, condition_columns
+from .snapshot import has_snapshot, open_snapshot, snapshot_path, write_snapshot
 
 class Database():
-    def __init__(self):
+    def __init__(self, snapshot_dir=None):
         self.db_config = {
         "dbname": "imdb",
         "user": "postgres",
         "password": "1234",
         "host": "localhost",
-        "port": "5432", 
+        "port": "5432",
     }
-    
-        self.connection = psycopg2.connect(**self.db_config) # Connect to DB
-
-    def fetch_table_from_db(self, table_name, column_names, connection):
-        query = f"SELECT {', '.join(column_names)} FROM {table_name};"
-        cursor = connection.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
+
+        # Tables are written here once and memory-mapped by later runs
+        self.snapshot_dir = snapshot_dir
+        self._connection = None
+
+    @property
+    def connection(self):
+        """
+        Connect to the DB on first use, so runs served from snapshots need no server.
+        """
+        if self._connection is None:
+            self._connection = psycopg2.connect(**self.db_config)
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection):
+        self._connection = connection
+
+    def fetch_table_from_db(self, table_name, column_names, connection=None, conditions=None, columnar=False, batch_size=50000, pushdown=False):
+        """
+        Stream a table through a server-side cursor, one `fetchmany` batch at a time.
+
+        Args:
+            table_name: Table to load.
+            column_names: Columns to select, ideally only the referenced ones.
+            connection: Open psycopg2 connection, defaults to this database's own.
+            conditions: Optional selection conditions, applied to every batch as it arrives.
+            columnar: Return a ColumnarRelation instead of a list of dictionaries.
+            batch_size: Number of rows fetched per round trip.
+            pushdown: Compile the conditions into the WHERE clause so PostgreSQL filters
+                the rows. Conditions that cannot be compiled are still applied per batch.
+
+        With a `snapshot_dir`, the loaded table is written as a snapshot the first
+        time and memory-mapped from disk afterwards, without touching the database.
+        """
+        if self.snapshot_dir is not None:
+            path = snapshot_path(self.snapshot_dir, table_name, column_names, conditions)
+            if not has_snapshot(path):
+                relation = self.stream_table(table_name, column_names, connection, conditions, True, batch_size, pushdown)
+                write_snapshot(relation, path, table_name)
+            relation = open_snapshot(path)
+            return relation if columnar else relation.to_rows()
+        return self.stream_table(table_name, column_names, connection, conditions, columnar, batch_size, pushdown)
+
+    def stream_table(self, table_name, column_names, connection, conditions, columnar, batch_size, pushdown):
+        """
+        Stream a table from PostgreSQL, see `fetch_table_from_db` for the arguments.
+        """
+        if connection is None:
+            connection = self.connection
+        where_clause, params = "", []
+        if pushdown:
+            where_clause, params, conditions = compile_conditions(conditions)
+            # Columns of the conditions left to Python still have to be loaded
+            needed = [column for condition in conditions for column in condition_columns(condition)]
+            column_names = column_names + [column for column in dict.fromkeys(needed) if column not in column_names]
+        query = f"SELECT {', '.join(column_names)} FROM {table_name}{where_clause};"
+        # A named cursor keeps the result set on the server
+        cursor = connection.cursor(name=f"fetch_{table_name}")
+        cursor.itersize = batch_size
+        cursor.execute(query, params or None)
+
+        selection = compile_selection(conditions or [])
+        batches = []
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if columnar:
+                batch = ColumnarRelation(dict(zip(column_names, zip(*rows))))
+            else:
+                batch = [dict(zip(column_names, row)) for row in rows]
+            batches.append(selection(batch))
         cursor.close()
 
-        # Convert to list of dictionaries
-        return [dict(zip(column_names, row)) for row in rows]
-    
-    def closeConnection(self):
-        if self.connection:
-            self.connection.close()
+        if columnar:
+            return ColumnarRelation.concat(batches, column_names)
+        return [row for batch in batches for row in batch]
 
+    def closeConnection(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,105 @@
+import numpy as np
+from .planner import equivalence_classes
+from .relation import ColumnarRelation, notna_mask
+
+INT32 = np.iinfo(np.int32)
+
+
+def key_classes(join_predicates):
+    """
+    Group the join key columns by equivalence class.
+
+    Returns:
+        A list of [(table, column), ...], one list per class.
+    """
+    classes = {}
+    for member, representative in equivalence_classes(join_predicates).items():
+        classes.setdefault(representative, []).append(member)
+    return list(classes.values())
+
+
+def compact_integers(columns):
+    """
+    Narrow integer key columns to int32 when every value fits, keeping the values.
+    """
+    bounds = [(int(values.min()), int(values.max())) for values in columns if len(values)]
+    if bounds and INT32.min <= min(lo for lo, _ in bounds) and max(hi for _, hi in bounds) <= INT32.max:
+        return [values.astype(np.int32) for values in columns]
+    return columns
+
+
+def shared_codes(columns, dictionaries):
+    """
+    Encode key columns holding arbitrary values against one shared dictionary,
+    so that equal values get the same code in every column.
+
+    Args:
+        columns: The key columns, possibly dictionary codes already.
+        dictionaries: The dictionary of every column, None for plain columns.
+
+    Returns:
+        (codes, dictionary) with one int32 code array per column.
+    """
+    positions = {}
+    codes = []
+    for values, dictionary in zip(columns, dictionaries):
+        if dictionary is not None:
+            remap = np.fromiter(
+                (positions.setdefault(v, len(positions)) for v in dictionary.tolist()),
+                dtype=np.int32, count=len(dictionary)
+            )
+            codes.append(np.where(values >= 0, remap[np.maximum(values, 0)] if len(remap) else -1, -1).astype(np.int32))
+        else:
+            codes.append(np.fromiter(
+                (-1 if v is None or v != v else positions.setdefault(v, len(positions)) for v in values.tolist()),
+                dtype=np.int32, count=len(values)
+            ))
+    shared = np.empty(len(positions), dtype=object)
+    shared[:] = list(positions)
+    return codes, shared
+
+
+def encode_join_keys(relations, join_predicates):
+    """
+    Give the join keys of a query compact fixed-width encodings.
+
+    Rows with a NULL join key can never join and are dropped. The keys of one
+    equivalence class are encoded together: integer keys are narrowed to int32
+    when their values allow it, any other keys are mapped to int32 codes of a
+    dictionary shared by the whole class, so semi-joins and joins compare codes.
+
+    Args:
+        relations: Dictionary table -> ColumnarRelation, after selections.
+        join_predicates: Join predicates of the query.
+
+    Returns:
+        A new dictionary table -> ColumnarRelation.
+    """
+    relations = dict(relations)
+    classes = key_classes(join_predicates)
+
+    for members in classes:
+        for table, column in members:
+            relation = relations[table]
+            if column in relation.dictionaries:
+                mask = relation[column] >= 0
+            else:
+                mask = notna_mask(relation[column])
+            if not mask.all():
+                relations[table] = relation.filter(mask)
+
+    for members in classes:
+        columns = [relations[table][column] for table, column in members]
+        dictionaries = [relations[table].dictionaries.get(column) for table, column in members]
+        if all(d is None and values.dtype.kind in "iu" for values, d in zip(columns, dictionaries)):
+            encoded, shared = compact_integers(columns), None
+        else:
+            encoded, shared = shared_codes(columns, dictionaries)
+        for (table, column), values in zip(members, encoded):
+            relation = relations[table]
+            dictionaries = dict(relation.dictionaries)
+            dictionaries.pop(column, None)
+            if shared is not None:
+                dictionaries[column] = shared
+            relations[table] = ColumnarRelation({**relation.columns, column: values}, dictionaries)
+    return relations
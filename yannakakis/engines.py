@@ -0,0 +1,23 @@
+from .wcoj import GenericJoin
+from .yannakakis import Yannakakis
+
+# Execution engines selectable per query through its `engine` attribute
+ENGINES = {
+    "yannakakis": Yannakakis,
+    "generic_join": GenericJoin,
+}
+
+
+def compare_engines(relations, join_tree, selection_criteria, projection_criteria, logger, logging, engines=None, applyAggregatePushdown=True):
+    """
+    Run the same query on several engines, head-to-head on the same relations.
+
+    Returns:
+        A dictionary engine name -> {"time": seconds, "result": query result}.
+    """
+    report = {}
+    for name in engines or ENGINES:
+        logger.info(f"Running engine :- {name}")
+        run = ENGINES[name](relations, join_tree, selection_criteria, projection_criteria, logger, logging, True, applyAggregatePushdown)
+        report[name] = {"time": run.timeTaken, "result": run.result}
+    return report
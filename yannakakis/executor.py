@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+import numpy as np
+from .relation import ColumnarRelation
+
+
+def share_array(array):
+    """
+    Copy an array into a new shared-memory block.
+
+    Returns:
+        (block, descriptor) where the descriptor (name, shape, dtype) is what gets
+        sent to the worker processes instead of the data itself.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(descriptor):
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def build_probe_table(right_keys, probe_rows):
+    """
+    Probe structure over the right keys, built once and shared by all workers.
+
+    Returns:
+        (table, offset): a boolean table indexed by key - offset when the key
+        range is small compared to the input, as np.isin does, otherwise the
+        sorted distinct keys and an offset of None.
+    """
+    if len(right_keys) == 0:
+        return np.empty(0, dtype=right_keys.dtype), None
+    low, high = int(right_keys.min()), int(right_keys.max())
+    if high - low < 4 * (probe_rows + len(right_keys)):
+        table = np.zeros(high - low + 1, dtype=bool)
+        table[right_keys - low] = True
+        return table, low
+    return np.unique(right_keys), None
+
+
+def semi_join_range(left, right, mask, start, stop, offset):
+    """
+    Worker task: probe the left keys in rows [start, stop) against the shared
+    probe structure of build_probe_table and write the matches into the shared output mask.
+    """
+    blocks = []
+    try:
+        left_block, left_keys = attach_array(left)
+        right_block, table = attach_array(right)
+        mask_block, out = attach_array(mask)
+        blocks = [left_block, right_block, mask_block]
+        keys = left_keys[start:stop]
+        if offset is not None:
+            positions = keys.astype(np.int64) - offset
+            inside = (positions >= 0) & (positions < len(table))
+            found = np.zeros(len(keys), dtype=bool)
+            found[inside] = table[positions[inside]]
+            out[start:stop] = found
+        elif len(table):
+            positions = np.minimum(np.searchsorted(table, keys), len(table) - 1)
+            out[start:stop] = table[positions] == keys
+        del left_keys, table, out, keys
+    finally:
+        for block in blocks:
+            block.close()
+    return start
+
+
+class ParallelReducer():
+    """
+    Multi-core semi-join reduction driven by the join tree's dependency DAG.
+
+    In the bottom-up pass a table is reduced as soon as all of its children are,
+    and in the top-down pass as soon as its parent is, so sibling subtrees run
+    concurrently on a thread pool. Semi-joins whose probe side has more than
+    `partition_threshold` rows on integer keys are additionally split across
+    worker processes: a probe table over the right keys is built once, and every
+    process probes a contiguous range of the left keys against it in shared memory.
+    """
+
+    def __init__(self, semi_join, logger, workers=None, partition_threshold=1_000_000, profiler=None):
+        """
+        Args:
+            semi_join: Function (reduced, left_table, right_table, left_key, right_key)
+                -> reduced left table, used for every semi-join that is not partitioned.
+            logger: Logger receiving the per-edge messages.
+            workers: Number of threads/processes, defaults to the CPU count.
+            partition_threshold: Minimum number of left rows before partitioning.
+            profiler: Optional profiling.Profiler recording the partitioned semi-joins.
+        """
+        self.semi_join = semi_join
+        self.logger = logger
+        self.workers = workers or os.cpu_count() or 1
+        self.partition_threshold = partition_threshold
+        self.profiler = profiler
+        self.processes = None
+        if self.workers > 1:
+            # Created before `run` starts any thread. Forked from a multi-threaded
+            # process, a worker could inherit a lock held by another thread, so
+            # the workers are started by a fork server (or spawned) instead.
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.processes = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.processes is not None:
+            self.processes.shutdown()
+            self.processes = None
+
+    def partitioned_semi_join(self, left, right, left_key, right_key):
+        """
+        Semi-join a large columnar relation, one contiguous range of its rows per process.
+        """
+        left_keys = left[left_key]
+        blocks = []
+        try:
+            left_block, left_desc = share_array(np.ascontiguousarray(left_keys))
+            # Built once here, so the workers only scan their own share of the left keys
+            table, offset = build_probe_table(right[right_key], len(left_keys))
+            right_block, right_desc = share_array(table)
+            mask_block, mask_desc = share_array(np.zeros(len(left_keys), dtype=bool))
+            blocks = [left_block, right_block, mask_block]
+            bounds = np.linspace(0, len(left_keys), self.workers + 1).astype(np.int64).tolist()
+            futures = [
+                self.processes.submit(semi_join_range, left_desc, right_desc, mask_desc, start, stop, offset)
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+            ]
+            for future in futures:
+                future.result()
+            mask = np.ndarray(len(left_keys), dtype=bool, buffer=mask_block.buf).copy()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return left.filter(mask)
+
+    def reduce(self, reduced, left_table, right_table, left_key, right_key, partition=True):
+        left, right = reduced[left_table], reduced[right_table]
+        if (partition and self.workers > 1 and isinstance(left, ColumnarRelation) and len(left) >= self.partition_threshold
+                and left[left_key].dtype.kind in "iu" and right[right_key].dtype.kind in "iu"):
+            if self.profiler is None:
+                return self.partitioned_semi_join(left, right, left_key, right_key)
+            with self.profiler.edge(left_table, right_table, left_key, right_key, len(left)) as record:
+                result = self.partitioned_semi_join(left, right, left_key, right_key)
+                record.update(rows_out=len(result), partitions=self.workers)
+            return result
+        return self.semi_join(reduced, left_table, right_table, left_key, right_key)
+
+    def run(self, tasks, dependencies, action):
+        """
+        Run `action(node)` for every node once all of its dependencies are done.
+        """
+        pending = {node: set(dependencies.get(node, ())) & set(tasks) for node in tasks}
+        dependents = {}
+        for node, deps in pending.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(node)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as threads:
+            running = {threads.submit(action, node): node for node, deps in pending.items() if not deps}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    future.result()
+                    for dependent in dependents.get(node, []):
+                        pending[dependent].discard(node)
+                        if not pending[dependent]:
+                            running[threads.submit(action, dependent)] = dependent
+
+    def bottom_up(self, reduced, join_tree, partition=True):
+        """
+        Parallel version of Yannakakis.bottom_up_semi_join. With `partition`
+        False every semi-join goes through the `semi_join` function.
+        """
+        reduced = dict(reduced)
+        children = {}
+        for edge in join_tree:
+            children.setdefault(edge["left"], []).append(edge)
+
+        def reduce_parent(parent):
+            for edge in children[parent]:
+                initialCount = len(reduced[parent])
+                reduced[parent] = self.reduce(reduced, parent, edge["right"], edge["left_key"], edge["right_key"], partition)
+                self.logger.info(f"BOTTOM UP :- {edge}  Dangling tuples removed :-  {initialCount - len(reduced[parent])}")
+
+        dependencies = {parent: [edge["right"] for edge in edges if edge["right"] in children] for parent, edges in children.items()}
+        self.run(list(children), dependencies, reduce_parent)
+        return reduced
+
+    def top_down(self, reduced, join_tree, partition=True):
+        """
+        Parallel version of Yannakakis.top_down_semi_join.
+        """
+        reduced = dict(reduced)
+        parent_edge = {edge["right"]: edge for edge in join_tree}
+
+        def reduce_child(child):
+            edge = parent_edge[child]
+            initialCount = len(reduced[child])
+            reduced[child] = self.reduce(reduced, child, edge["left"], edge["right_key"], edge["left_key"], partition)
+            self.logger.info(f"TOP DOWN :- {edge}  Dangling tuples removed :- {initialCount - len(reduced[child])}")
+
+        dependencies = {child: [edge["left"]] for child, edge in parent_edge.items()}
+        self.run(list(parent_edge), dependencies, reduce_child)
+        return reduced
@@ -0,0 +1,330 @@
+import numpy as np
+from .aggregate import combine, is_aggregate_query, parse_aggregates
+from .planner import build_join_tree, query_columns
+from .profiling import Profiler, sampled_sizeof
+from .relation import as_columnar, notna_mask
+from .selection import compile_selection
+from .yannakakis import Yannakakis
+
+
+class GrowableColumn():
+    """
+    Append-only numpy column with amortised O(1) appends and in-place updates.
+    """
+
+    def __init__(self, dtype):
+        self.data = np.zeros(16, dtype=dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.zeros(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class NodeState():
+    """
+    Persistent state of one relation of the join tree.
+
+    Per row: its join keys, its aggregated values, its weight (the number of
+    join results of its subtree it takes part in, 0 for a dangling row) and its
+    partial MIN/MAX over the subtree. Per distinct key towards the parent: the
+    sum of the weights (`counts`) and the MIN/MAX over the live rows
+    (`extremes`), which is all the parent needs to know about this subtree.
+    """
+
+    def __init__(self, key_columns, labels):
+        self.keys = {column: GrowableColumn(object) for column in key_columns}
+        self.values = {}
+        self.weights = GrowableColumn(np.int64)
+        self.partials = {label: GrowableColumn(object) for label in labels}
+        # Key towards the parent -> slot of counts / extremes
+        self.slots = {}
+        self.counts = GrowableColumn(np.int64)
+        self.extremes = {label: GrowableColumn(object) for label in labels}
+        # Child table -> {key value -> rows of this table holding it}
+        self.rows_by_key = {}
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __sizeof__(self):
+        """
+        Bytes held by the state: the allocated column buffers with the objects
+        they reference, and an estimate of the hash maps (see sampled_sizeof).
+        """
+        columns = [self.weights, self.counts, *self.keys.values(), *self.values.values(), *self.partials.values(), *self.extremes.values()]
+        size = object.__sizeof__(self) + sum(sampled_sizeof(column.data) for column in columns)
+        return size + sampled_sizeof(self.slots) + sum(sampled_sizeof(index) for index in self.rows_by_key.values())
+
+    def slot_of(self, keys):
+        """
+        Slot of every key, -1 for keys no row of this table holds.
+        """
+        slots = self.slots
+        return np.fromiter((slots.get(k, -1) for k in keys.tolist()), dtype=np.int64, count=len(keys))
+
+    def add_slots(self, keys):
+        """
+        Slot of every key, creating empty slots for new keys. NULL keys get -1.
+        """
+        slots, created = self.slots, []
+        result = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys.tolist()):
+            if key is None:
+                result[i] = -1
+                continue
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = len(slots)
+                created.append(slot)
+            result[i] = slot
+        if created:
+            self.counts.extend(np.zeros(len(created), dtype=np.int64))
+            for extremes in self.extremes.values():
+                extremes.extend(np.full(len(created), None, dtype=object))
+        return result
+
+
+class IncrementalYannakakis(Yannakakis):
+    """
+    Yannakakis with incremental view maintenance of COUNT(*)/MIN/MAX queries
+    under inserts.
+
+    The first run evaluates the query like `Yannakakis` with aggregate pushdown,
+    but keeps the bottom-up pass as persistent state: the weight of every row
+    (0 for rows the semi-joins would remove), per-key counts and MIN/MAX towards
+    each parent, and hash indexes from the keys of a child to the parent rows
+    holding them. `insert` then takes batches of new rows, applies the
+    selections to them only, and pushes the change of the counts up the join
+    tree, revisiting only the ancestor rows whose keys were touched. The cost
+    is proportional to the delta and its fan-out, not to the database.
+
+    Inserts only grow the set of live rows, so a MIN/MAX is updated by
+    combining it with the new partials; deletes are not supported.
+    """
+
+    def __init__(self, relations, join_tree, selection_criteria, projection_criteria, logger, logging, applyCardinalityEstimation = True, applyAggregatePushdown = True, statistics = None, *, tables = None, traceMemory = False, deepMemory = False):
+        """
+        The positional arguments are those of `Yannakakis`.
+
+        Args:
+            applyAggregatePushdown: Must be True, the maintained state is the pushed down aggregates.
+            tables: Optional dictionary relation name -> base table, so deltas can
+                be given per base table for queries using a table under several aliases.
+        """
+        if not is_aggregate_query(projection_criteria):
+            raise ValueError("Incremental maintenance supports COUNT(*), MIN and MAX queries only")
+        if not applyAggregatePushdown:
+            raise ValueError("Incremental maintenance requires aggregate pushdown")
+        self.tables = tables or {}
+        self.nodes = {}
+        self.tree = None
+        self.order = []
+        self.selections = {}
+        self.aggregates = parse_aggregates(projection_criteria)
+        self.count = 0
+        self.extremes = {label: None for label, _, _, _ in self.aggregates}
+        super().__init__(
+            relations, join_tree, selection_criteria, projection_criteria, logger, logging,
+            applyCardinalityEstimation, True, statistics, traceMemory=traceMemory, deepMemory=deepMemory
+        )
+
+    def yannakakis(self, relations, join_tree, selection_criteria, projection_criteria):
+        profiler = self.profiler
+        profiler.start()
+
+        with profiler.phase("selection", "Time taken to Selections :- "):
+            # Kept for the deltas, so empty lists of rows keep their columns
+            self.queryColumns = query_columns(join_tree, selection_criteria, projection_criteria)
+            relations = {table: as_columnar(rel, self.queryColumns.get(table)) for table, rel in relations.items()}
+            self.selections = {table: compile_selection(selection_criteria.get(table, [])) for table in relations}
+            relations = {table: self.selections[table](rel) for table, rel in relations.items()}
+        self.measure_memory(relations, "Memory Usage After Selections")
+
+        with profiler.phase("join_order", "Time taken to calculate join order :- "):
+            join_tree = build_join_tree(join_tree)
+            if self.cardinalityEstimation:
+                join_tree = self.decide_join_order(relations, join_tree)
+            self.logger.info(f"Join tree :- {join_tree}")
+            self.build_state(join_tree)
+
+        # Inserting children before their parents finds every parent empty, so
+        # nothing propagates and the build is the bottom-up pass in linear time
+        with profiler.phase("bottom_up", "Time taken to build the incremental state :- "):
+            for table in reversed(self.order):
+                self.insert_rows(table, relations[table])
+
+        self.timeTaken = profiler.stop()
+        self.logger.info(f"Overall time taken by Yannakakis algirithm :-  {self.timeTaken:.6f} seconds")
+        # A node measures as its row count (len) and state size (__sizeof__)
+        self.profiler.record_memory("Incremental State", self.nodes)
+        return self.current_result()
+
+    def build_state(self, join_tree):
+        """
+        Set up the empty state of every relation of the rooted join tree.
+        """
+        self.tree = join_tree
+        if join_tree:
+            self.order = [join_tree[0]["left"]] + [edge["right"] for edge in join_tree]
+        else:
+            self.order = list(self.selections)
+        self.parent_edge = {edge["right"]: edge for edge in join_tree}
+        self.child_edges = {table: [edge for edge in join_tree if edge["left"] == table] for table in self.order}
+
+        subtree = {table: {table} for table in self.order}
+        for edge in reversed(join_tree):
+            subtree[edge["left"]] |= subtree[edge["right"]]
+        for table in self.order:
+            key_columns = [edge["left_key"] for edge in self.child_edges[table]]
+            if table in self.parent_edge:
+                key_columns.append(self.parent_edge[table]["right_key"])
+            labels = [label for label, _, owner, _ in self.aggregates if owner in subtree[table]]
+            node = NodeState(dict.fromkeys(key_columns), labels)
+            node.values = {label: GrowableColumn(object) for label, _, owner, _ in self.aggregates if owner == table}
+            node.rows_by_key = {edge["right"]: {} for edge in self.child_edges[table]}
+            self.nodes[table] = node
+
+    def node_weights(self, table, rows, keys):
+        """
+        Weights and partial aggregates of rows of `table` from the current state of its children.
+
+        Args:
+            rows: Row ids, used to read the aggregated values of the table itself.
+            keys: Dictionary key column -> key values of those rows.
+        """
+        node = self.nodes[table]
+        weights = np.ones(len(rows), dtype=np.int64)
+        partials = {label: values.view()[rows] for label, values in node.values.items()}
+        for edge in self.child_edges[table]:
+            child = self.nodes[edge["right"]]
+            slots = child.slot_of(keys[edge["left_key"]])
+            found = slots >= 0
+            counts = np.zeros(len(rows), dtype=np.int64)
+            counts[found] = child.counts.view()[slots[found]]
+            weights *= counts
+            for label, extremes in child.extremes.items():
+                partial = np.full(len(rows), None, dtype=object)
+                partial[found] = extremes.view()[slots[found]]
+                partials[label] = partial
+        dead = weights == 0
+        for partial in partials.values():
+            partial[dead] = None
+        return weights, partials
+
+    def insert_rows(self, table, relation):
+        """
+        Append rows (already selected) to a relation and propagate them.
+        """
+        node = self.nodes[table]
+        first = len(node)
+        rows = np.arange(first, first + len(relation), dtype=np.int64)
+        keys = {column: relation.decoded(column).astype(object) for column in node.keys}
+        for column, values in keys.items():
+            node.keys[column].extend(values)
+        for label, func, owner, column in self.aggregates:
+            if owner == table:
+                node.values[label].extend(relation.decoded(column).astype(object))
+
+        for edge in self.child_edges[table]:
+            index = node.rows_by_key[edge["right"]]
+            for row, key in zip(rows.tolist(), keys[edge["left_key"]].tolist()):
+                if key is not None:
+                    index.setdefault(key, []).append(row)
+
+        weights, partials = self.node_weights(table, rows, keys)
+        node.weights.extend(weights)
+        for label, partial in partials.items():
+            node.partials[label].extend(partial)
+        self.propagate(table, rows, weights)
+
+    def propagate(self, table, rows, deltas):
+        """
+        Push the weight changes `deltas` of `rows` of `table` up to the root.
+        """
+        while True:
+            node = self.nodes[table]
+            changed = deltas != 0
+            rows, deltas = rows[changed], deltas[changed]
+            if len(rows) == 0:
+                return
+            partials = {label: values.view()[rows] for label, values in node.partials.items()}
+
+            if table not in self.parent_edge:
+                self.count += int(deltas.sum())
+                for label, func, _, _ in self.aggregates:
+                    for value in partials[label][notna_mask(partials[label])].tolist():
+                        self.extremes[label] = combine(func, self.extremes[label], value)
+                return
+
+            edge = self.parent_edge[table]
+            slots = node.add_slots(node.keys[edge["right_key"]].view()[rows])
+            keyed = slots >= 0
+            slots, deltas = slots[keyed], deltas[keyed]
+            np.add.at(node.counts.data, slots, deltas)
+            for label, values in partials.items():
+                extremes, func = node.extremes[label].data, self.aggregate_function(label)
+                for slot, value in zip(slots.tolist(), values[keyed].tolist()):
+                    if value is not None:
+                        extremes[slot] = combine(func, extremes[slot], value)
+
+            # Parent rows holding a key whose count changed get their weight recomputed
+            parent = self.nodes[edge["left"]]
+            index = parent.rows_by_key[table]
+            changed_keys = node.keys[edge["right_key"]].view()[rows[keyed]]
+            affected = [index.get(key, ()) for key in dict.fromkeys(changed_keys.tolist())]
+            rows = np.fromiter((row for group in affected for row in group), dtype=np.int64)
+            if len(rows) == 0:
+                return
+            keys = {column: values.view()[rows] for column, values in parent.keys.items()}
+            weights, partials = self.node_weights(edge["left"], rows, keys)
+            deltas = weights - parent.weights.view()[rows]
+            parent.weights.data[rows] = weights
+            for label, partial in partials.items():
+                parent.partials[label].data[rows] = partial
+            table = edge["left"]
+
+    def aggregate_function(self, label):
+        return next(func for name, func, _, _ in self.aggregates if name == label)
+
+    def current_result(self):
+        return [{"COUNT(*)": self.count, **self.extremes}]
+
+    def insert(self, deltas):
+        """
+        Apply a batch of inserted rows and update the result.
+
+        Args:
+            deltas: Dictionary relation (or base table) name -> new rows, as a
+                ColumnarRelation or a list of dictionaries holding at least the
+                join, selection and aggregated columns of the query.
+
+        Returns:
+            The updated result, also stored in `result`.
+        """
+        self.profiler = Profiler(self.logger, self.profiler.trace_memory, self.profiler.deep_memory)
+        self.profiler.start()
+        for name, rows in deltas.items():
+            targets = [table for table in self.order if self.tables.get(table, table) == name] or [name]
+            for table in targets:
+                if table not in self.nodes:
+                    raise KeyError(f"Table '{name}' is not part of the query.")
+                with self.profiler.phase("delta", f"Time taken to apply the delta of {table} :- ") as record:
+                    relation = self.selections[table](as_columnar(rows, self.queryColumns.get(table)))
+                    record["table"], record["rows_in"], record["rows_selected"] = table, len(rows), len(relation)
+                    self.insert_rows(table, relation)
+        self.timeTaken = self.profiler.stop()
+        self.logger.info(f"Time taken to maintain the result :- {self.timeTaken:.6f} seconds")
+        self.result = self.current_result()
+        return self.result
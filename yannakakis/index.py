@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class KeyIndex():
+    """
+    Sorted index over an integer key column: key -> row positions.
+
+    The rows are kept in key order (`order`), grouped by distinct key with the
+    offset (`starts`) and size (`counts`) of every group. A semi-join that
+    shrinks the relation filters the index in linear time instead of rebuilding it.
+    """
+
+    def __init__(self, order, sorted_keys):
+        self.order = order
+        self.sorted_keys = sorted_keys
+        if len(sorted_keys):
+            self.starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        else:
+            self.starts = np.empty(0, dtype=np.int64)
+        self.unique_keys = sorted_keys[self.starts]
+        self.counts = np.diff(np.r_[self.starts, len(sorted_keys)])
+
+    @classmethod
+    def build(cls, keys):
+        order = np.argsort(keys, kind="stable")
+        return cls(order, keys[order])
+
+    def __len__(self):
+        return len(self.order)
+
+    def lookup(self, probe_keys):
+        """
+        Group position of every probe key, plus a mask of the keys that were found.
+        """
+        if len(self.unique_keys) == 0:
+            return np.zeros(len(probe_keys), dtype=np.int64), np.zeros(len(probe_keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.unique_keys, probe_keys), len(self.unique_keys) - 1)
+        return positions, self.unique_keys[positions] == probe_keys
+
+    def contains(self, probe_keys):
+        """
+        Semi-join probe: mask of the probe keys present in the index.
+        """
+        return self.lookup(probe_keys)[1]
+
+    def join_indices(self, probe_keys):
+        """
+        Equi-join probe.
+
+        Returns:
+            (probe_idx, row_idx) so that probe_keys[probe_idx[i]] matches the indexed row row_idx[i].
+        """
+        positions, found = self.lookup(probe_keys)
+        counts = np.where(found, self.counts[positions] if len(self.counts) else 0, 0)
+        total = int(counts.sum())
+        probe_idx = np.repeat(np.arange(len(probe_keys), dtype=np.int64), counts)
+        offsets = np.cumsum(counts) - counts
+        lo = self.starts[positions] if len(self.starts) else np.zeros(len(probe_keys), dtype=np.int64)
+        sorted_idx = np.arange(total, dtype=np.int64) - np.repeat(offsets, counts) + np.repeat(lo, counts)
+        return probe_idx, self.order[sorted_idx]
+
+    def filter(self, mask):
+        """
+        Index of the relation filtered by `mask`, without sorting again.
+        """
+        new_positions = np.cumsum(mask) - 1
+        keep = mask[self.order]
+        return KeyIndex(new_positions[self.order[keep]], self.sorted_keys[keep])
+
+
+class IndexRegistry():
+    """
+    Key indexes of the relations of one run, shared by the bottom-up, top-down
+    and join phases. Every index remembers the relation object it was built on:
+    when a semi-join shrinks a table its indexes are filtered along with it,
+    and a table replaced by other means is indexed again on first use.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.builds = 0
+        self.reuses = 0
+
+    def get(self, table_name, column, relation):
+        """
+        Index of `relation[column]`, or None when the column has no integer keys.
+        """
+        if relation[column].dtype.kind not in "iu":
+            return None
+        entry = self.tables.get(table_name)
+        if entry is None or entry["relation"] is not relation:
+            entry = {"relation": relation, "columns": {}}
+            self.tables[table_name] = entry
+        if column in entry["columns"]:
+            self.reuses += 1
+        else:
+            entry["columns"][column] = KeyIndex.build(relation[column])
+            self.builds += 1
+        return entry["columns"][column]
+
+    def filter(self, table_name, old_relation, mask, relation):
+        """
+        Carry the indexes of `old_relation` over to `relation`, its rows selected by `mask`.
+        """
+        entry = self.tables.get(table_name)
+        if entry is None or entry["relation"] is not old_relation:
+            self.tables.pop(table_name, None)
+            return
+        entry["columns"] = {column: index.filter(mask) for column, index in entry["columns"].items()}
+        entry["relation"] = relation
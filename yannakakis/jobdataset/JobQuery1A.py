@@ -9,14 +9,19 @@ class JobQuery1A:
         }
         
         self.selection_criteria = {
-        "movie_companies": [{"column": "note", "operator": "not like", "value": "%(as Metro-Goldwyn-Mayer Pictures)%"}],
-        "movie_companies": [{"column": "note", "operator": "like", "value": "%(co-production)%"}],
+        "movie_companies": [
+            {"column": "note", "operator": "not like", "value": "%(as Metro-Goldwyn-Mayer Pictures)%"},
+            {"column": "note", "operator": "like", "value": "%(co-production)%"}
+        ],
         "company_type": [{"column": "kind", "operator": "==", "value": "production companies"}],
         "info_type": [{"column": "info", "operator": "==", "value": "top 250 rank"}]
         }
 
         self.projection_criteria = {}
 
+        # Execution engine, see yannakakis.engines.ENGINES
+        self.engine = "yannakakis"
+
         self.join_tree = [
         {"left": "company_type", "right": "movie_companies", "left_key": "id", "right_key": "company_type_id"},
         {"left": "movie_companies", "right": "title", "left_key": "movie_id", "right_key": "id"},
@@ -21,6 +21,9 @@ class JobQuery5B:
 
         self.projection_criteria = {}
 
+        # Execution engine, see yannakakis.engines.ENGINES
+        self.engine = "yannakakis"
+
         self.join_tree = [
             {"left": "title", "right": "movie_info", "left_key": "id", "right_key": "movie_id"},
             {"left": "title", "right": "movie_companies", "left_key": "id", "right_key": "movie_id"},
@@ -19,6 +19,9 @@ class JobQuery5C:
 
         self.projection_criteria = {}
 
+        # Execution engine, see yannakakis.engines.ENGINES
+        self.engine = "yannakakis"
+
         self.join_tree = [
         {"left": "company_type", "right": "movie_companies", "left_key": "id", "right_key": "company_type_id"},
         {"left": "movie_companies", "right": "title", "left_key": "movie_id", "right_key": "id"},
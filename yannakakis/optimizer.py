@@ -0,0 +1,189 @@
+from .planner import build_join_tree
+from .relation import as_columnar
+from .stats import collect_column_statistics
+
+
+def overlap_fraction(stats, other):
+    """
+    Fraction of the non-NULL values of `stats` that fall inside the value range of `other`.
+    """
+    if stats.histogram is None or other.histogram is None or len(other.histogram) == 0:
+        return 1.0
+    valid = 1.0 - stats.null_fraction
+    if valid <= 0:
+        return 0.0
+    return min(stats.range_fraction(other.histogram[0], other.histogram[-1]) / valid, 1.0)
+
+
+def estimate_join_size(left_rows, left_stats, right_rows, right_stats):
+    """
+    Estimate |L join R| on one key. Most common values present on both sides are
+    matched exactly, the remaining rows are assumed uniform over the distinct
+    values that overlap according to the histograms.
+    """
+    size, left_matched, right_matched, common = 0.0, 0.0, 0.0, 0
+    for value, frequency in left_stats.most_common.items():
+        if value in right_stats.most_common:
+            size += frequency * left_rows * right_stats.most_common[value] * right_rows
+            left_matched += frequency
+            right_matched += right_stats.most_common[value]
+            common += 1
+
+    left_overlap = overlap_fraction(left_stats, right_stats)
+    right_overlap = overlap_fraction(right_stats, left_stats)
+    left_rest = left_rows * max(1.0 - left_stats.null_fraction - left_matched, 0.0) * left_overlap
+    right_rest = right_rows * max(1.0 - right_stats.null_fraction - right_matched, 0.0) * right_overlap
+    left_distinct = max((left_stats.distinct_count - common) * left_overlap, 1.0)
+    right_distinct = max((right_stats.distinct_count - common) * right_overlap, 1.0)
+    return size + left_rest * right_rest / max(left_distinct, right_distinct)
+
+
+def estimate_semi_join_size(left_rows, left_stats, right_stats):
+    """
+    Estimate |L semi-join R| assuming containment of the smaller key set in the larger.
+    """
+    if left_stats.distinct_count == 0:
+        return 0.0
+    overlap = overlap_fraction(left_stats, right_stats)
+    if overlap <= 0:
+        return 0.0
+    kept = min(1.0, right_stats.distinct_count * overlap_fraction(right_stats, left_stats) / (left_stats.distinct_count * overlap))
+    return left_rows * overlap * kept
+
+
+class JoinOrderOptimizer():
+    """
+    Cost-based choice of the join tree root and of the order of siblings.
+
+    For every directed tree edge (parent -> child) the subtree under the child is
+    summarised once (dynamic programming over the tree): its rows after the
+    bottom-up semi-joins, the distinct join keys it still exposes to the parent
+    and the size of its join. The cost of a root is the sum of the intermediate
+    result sizes of the breadth-first join phase, with siblings joined in order
+    of increasing fan-out, which minimises that sum for a fixed root.
+    """
+
+    def __init__(self, relations, statistics=None):
+        """
+        Args:
+            relations: Dictionary table -> relation, after selections.
+            statistics: Optional dictionary table -> {column: ColumnStatistics}
+                collected at load time. Missing entries are computed on demand.
+        """
+        self.relations = relations
+        self.statistics = statistics or {}
+        self.rows = {table: len(rel) for table, rel in relations.items()}
+        self.cache = {}
+        # Cost of the last optimized plan, 0 for queries without joins
+        self.estimated_cost = 0.0
+
+    def column_stats(self, table, column):
+        key = (table, column)
+        if key not in self.cache:
+            stats = self.statistics.get(table, {}).get(column)
+            if stats is None:
+                stats = collect_column_statistics(as_columnar(self.relations[table])[column]) if self.rows[table] else None
+            if stats is not None:
+                stats = stats.scaled(self.rows[table])
+            self.cache[key] = stats
+        return self.cache[key]
+
+    def fanout(self, table, key_stats, subtree_rows, subtree_stats):
+        """
+        Expected number of subtree join results matching one row of `table`.
+        """
+        rows = max(self.rows[table], 1)
+        return estimate_join_size(rows, key_stats, subtree_rows, subtree_stats) / rows
+
+    def subtree(self, child, child_key, parent, parent_key, neighbours, memo):
+        """
+        Summarise the subtree hanging below `child` when its parent is `parent`.
+
+        Returns:
+            (reduced_rows, key_stats, output_rows) of that subtree.
+        """
+        memo_key = (child, parent)
+        if memo_key in memo:
+            return memo[memo_key]
+
+        rows = float(self.rows[child])
+        output = rows
+        fanouts = []
+        for grandchild, own_key, grandchild_key in neighbours[child]:
+            if grandchild == parent:
+                continue
+            g_rows, g_stats, g_output = self.subtree(grandchild, grandchild_key, child, own_key, neighbours, memo)
+            own_stats = self.column_stats(child, own_key)
+            if own_stats is None or g_stats is None or g_rows == 0:
+                rows, output = 0.0, 0.0
+                continue
+            rows = min(rows, estimate_semi_join_size(rows, own_stats.scaled(int(rows)), g_stats))
+            fanouts.append(self.fanout(child, own_stats, g_output, g_stats))
+
+        for fanout in fanouts:
+            output *= fanout
+        key_stats = None
+        if child_key is not None:
+            key_stats = self.column_stats(child, child_key)
+        if key_stats is not None:
+            key_stats = key_stats.scaled(int(rows))
+        memo[memo_key] = (rows, key_stats, output)
+        return memo[memo_key]
+
+    def plan_cost(self, root, neighbours, memo):
+        """
+        Estimated cost of the join phase when the tree is rooted at `root`.
+
+        Returns:
+            (cost, fanouts) where fanouts maps every non-root table to the factor
+            by which joining it grows the accumulated result.
+        """
+        rows, _, _ = self.subtree(root, None, None, None, neighbours, memo)
+        fanouts = {}
+        stack = [(root, None)]
+        while stack:
+            table, parent = stack.pop()
+            for child, own_key, child_key in neighbours[table]:
+                if child == parent:
+                    continue
+                c_rows, c_stats, c_output = self.subtree(child, child_key, table, own_key, neighbours, memo)
+                own_stats = self.column_stats(table, own_key)
+                fanouts[child] = self.fanout(table, own_stats, c_output, c_stats) if own_stats and c_stats else 0.0
+                stack.append((child, table))
+
+        join_tree = build_join_tree(self.edges, root=root, child_order=lambda table: fanouts[table])
+        cost, accumulated = 0.0, rows
+        for edge in join_tree:
+            accumulated *= fanouts[edge["right"]]
+            cost += accumulated
+        return cost, fanouts
+
+    def optimize(self, join_tree):
+        """
+        Pick the cheapest root and sibling order for the query.
+
+        Args:
+            join_tree: Join predicates (any edge order).
+
+        Returns:
+            A rooted join tree in top-down order, as produced by planner.build_join_tree.
+        """
+        self.edges = build_join_tree(join_tree)
+        self.estimated_cost = 0.0
+        if not self.edges:
+            return self.edges
+
+        neighbours = {}
+        for edge in self.edges:
+            neighbours.setdefault(edge["left"], []).append((edge["right"], edge["left_key"], edge["right_key"]))
+            neighbours.setdefault(edge["right"], []).append((edge["left"], edge["right_key"], edge["left_key"]))
+
+        memo = {}
+        best = None
+        for root in neighbours:
+            cost, fanouts = self.plan_cost(root, neighbours, memo)
+            if best is None or cost < best[0]:
+                best = (cost, root, fanouts)
+        cost, root, fanouts = best
+        self.estimated_cost = cost
+        return build_join_tree(self.edges, root=root, child_order=lambda table: fanouts[table])
@@ -0,0 +1,188 @@
+from collections import deque
+from .selection import condition_columns
+
+
+class CyclicQueryError(ValueError):
+    """
+    Raised when the join predicates of a query do not form an acyclic hypergraph.
+    """
+
+
+def equivalence_classes(join_predicates):
+    """
+    Merge equi-join predicates into equivalence classes of (table, column) pairs,
+    e.g. t.id = mc.movie_id and mc.movie_id = mi.movie_id become one class.
+
+    Args:
+        join_predicates: List of edges with `left`, `right`, `left_key`, `right_key`.
+
+    Returns:
+        A dictionary mapping every (table, column) pair to its class representative.
+    """
+    parent = {}
+
+    def find(attr):
+        parent.setdefault(attr, attr)
+        while parent[attr] != attr:
+            parent[attr] = parent[parent[attr]]
+            attr = parent[attr]
+        return attr
+
+    for predicate in join_predicates:
+        left = find((predicate["left"], predicate["left_key"]))
+        right = find((predicate["right"], predicate["right_key"]))
+        if left != right:
+            parent[right] = left
+
+    return {attr: find(attr) for attr in parent}
+
+
+def table_attributes(join_predicates):
+    """
+    Map every table to the equivalence classes it joins on.
+
+    Returns:
+        A dictionary table -> {class representative: column of that table}.
+
+    Raises:
+        ValueError: if one class holds two columns of the same table, e.g. through
+            r.a = s.x and r.b = s.x, which would imply r.a = r.b.
+    """
+    classes = equivalence_classes(join_predicates)
+    attributes = {}
+    for predicate in join_predicates:
+        for side in ("left", "right"):
+            table, column = predicate[side], predicate[f"{side}_key"]
+            known = attributes.setdefault(table, {}).setdefault(classes[(table, column)], column)
+            if known != column:
+                raise ValueError(f"Table '{table}' joins on '{known}' and '{column}' in one equivalence class, composite join keys are not supported.")
+    return attributes
+
+
+def gyo_reduction(attributes):
+    """
+    Run the GYO ear-removal pass over the join hypergraph.
+
+    Args:
+        attributes: Output of `table_attributes`.
+
+    Returns:
+        A list of (ear, witness, join class) triples in removal order. The witness
+        of every ear becomes its neighbour in the join tree.
+
+    Raises:
+        CyclicQueryError: if no ear can be found while more than one table remains.
+    """
+    remaining = list(attributes.keys())
+    removals = []
+    while len(remaining) > 1:
+        for ear in remaining:
+            others = [table for table in remaining if table != ear]
+            shared = {c for c in attributes[ear] if any(c in attributes[table] for table in others)}
+            if not shared:
+                raise ValueError(f"Table '{ear}' is not connected to {others} by any join predicate.")
+            witness = next((table for table in others if shared <= attributes[table].keys()), None)
+            if witness is None:
+                continue
+            if len(shared) > 1:
+                raise ValueError(f"Table '{ear}' joins '{witness}' on more than one column, composite join keys are not supported.")
+            removals.append((ear, witness, shared.pop()))
+            remaining.remove(ear)
+            break
+        else:
+            raise CyclicQueryError(f"Query is cyclic, no ear left to remove among tables {remaining}.")
+    return removals
+
+
+def build_join_tree(join_predicates, root=None, child_order=None):
+    """
+    Build a rooted join tree from the join predicates of a query.
+
+    Args:
+        join_predicates: List of edges with `left`, `right`, `left_key`, `right_key`,
+            in any order and possibly redundant (cycles through one equivalence class).
+        root: Table to use as root. Defaults to the left table of the first predicate.
+        child_order: Optional key function on table names used to order siblings.
+
+    Returns:
+        A list of edges in top-down (breadth-first) order, with the parent as `left`
+        and the child as `right`. Walking it backwards visits every child before its parent.
+    """
+    if not join_predicates:
+        return []
+
+    attributes = table_attributes(join_predicates)
+    neighbours = {table: [] for table in attributes}
+    for ear, witness, join_class in gyo_reduction(attributes):
+        neighbours[ear].append((witness, join_class))
+        neighbours[witness].append((ear, join_class))
+
+    if root is None:
+        root = join_predicates[0]["left"]
+    if root not in attributes:
+        raise KeyError(f"Root '{root}' is not part of the query.")
+
+    join_tree = []
+    visited = {root}
+    queue = deque([root])
+    while queue:
+        parent = queue.popleft()
+        children = [(child, c) for child, c in neighbours[parent] if child not in visited]
+        if child_order is not None:
+            children.sort(key=lambda item: child_order(item[0]))
+        for child, join_class in children:
+            visited.add(child)
+            queue.append(child)
+            join_tree.append({
+                "left": parent,
+                "right": child,
+                "left_key": attributes[parent][join_class],
+                "right_key": attributes[child][join_class],
+            })
+    return join_tree
+
+
+def query_columns(join_tree, selection_criteria, projection_criteria, include_selection=True):
+    """
+    Columns a query reads from every table: join keys, selection and projected columns.
+
+    Args:
+        include_selection: Whether columns used only by selections are included.
+
+    Returns:
+        A dictionary table -> columns, in order of first use.
+    """
+    used = {}
+    for edge in join_tree:
+        used.setdefault(edge["left"], {})[edge["left_key"]] = None
+        used.setdefault(edge["right"], {})[edge["right_key"]] = None
+    if include_selection:
+        for table, conditions in selection_criteria.items():
+            for condition in conditions:
+                used.setdefault(table, {}).update(dict.fromkeys(condition_columns(condition)))
+    for table, projected in projection_criteria.items():
+        for col in projected:
+            if col.startswith(("MIN(", "MAX(")):
+                col = col[4:-1]
+            used.setdefault(table, {})[col] = None
+    return {table: list(cols) for table, cols in used.items()}
+
+
+def referenced_columns(columns, join_tree, selection_criteria, projection_criteria, include_selection=True):
+    """
+    Prune the column lists of a query definition to the columns it actually uses.
+
+    Args:
+        columns: Dictionary table -> all candidate columns (e.g. `JobQuery*.columns`).
+        join_tree: Join predicates of the query.
+        selection_criteria: Dictionary table -> list of conditions.
+        projection_criteria: Dictionary table -> list of projected columns, where
+            aggregates are written as `MIN(col)` / `MAX(col)`.
+        include_selection: Whether columns used only by selections are needed, which
+            is not the case when the selections are pushed down into SQL.
+
+    Returns:
+        A dictionary table -> referenced columns, in the order of `columns`.
+    """
+    used = query_columns(join_tree, selection_criteria, projection_criteria, include_selection)
+    return {table: [col for col in cols if col in used.get(table, ())] for table, cols in columns.items()}
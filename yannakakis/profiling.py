@@ -0,0 +1,236 @@
+import itertools
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+from .relation import ColumnarRelation
+
+# Items per list, dictionary or object array measured by the default memory estimate
+MEMORY_SAMPLE = 1000
+
+
+def deep_sizeof(value, seen=None):
+    """
+    Bytes held by a relation or result, including the arrays and Python objects
+    it references. Objects shared between rows (or relations, when the same
+    `seen` set is passed) are counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, ColumnarRelation):
+        arrays = list(value.columns.values()) + list(value.dictionaries.values())
+        return object.__sizeof__(value) + sum(deep_sizeof(array, seen) for array in arrays)
+    if isinstance(value, np.ndarray):
+        size = value.nbytes
+        if value.dtype.kind == "O":
+            size += sum(deep_sizeof(v, seen) for v in value.tolist())
+        return size
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(deep_sizeof(v, seen) for v in value)
+    return sys.getsizeof(value)
+
+
+def sampled_sizeof(value, sample=MEMORY_SAMPLE):
+    """
+    Estimate of `deep_sizeof` visiting at most `sample` items per container.
+
+    Column buffers are measured exactly. The Python objects referenced by a
+    list, dictionary or object array (e.g. the rows of a list of dictionaries
+    or the strings of a dictionary) are measured on evenly spaced items and
+    scaled to the length of the container.
+    """
+    if isinstance(value, ColumnarRelation):
+        arrays = list(value.columns.values()) + list(value.dictionaries.values())
+        return object.__sizeof__(value) + sum(sampled_sizeof(array, sample) for array in arrays)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind != "O":
+            return value.nbytes
+        return value.nbytes + sampled_items_sizeof(value, sample)
+    if isinstance(value, dict):
+        seen = set()
+        measured = sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in itertools.islice(value.items(), sample))
+        return sys.getsizeof(value) + (measured * len(value) // min(len(value), sample) if value else 0)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sampled_items_sizeof(value, sample)
+    return deep_sizeof(value)
+
+
+def sampled_items_sizeof(values, sample):
+    """
+    Deep size of the items of a sequence or set, extrapolated from at most `sample` of them.
+    """
+    if len(values) <= sample:
+        items = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    elif isinstance(values, (list, tuple, np.ndarray)):
+        items = [values[i] for i in np.linspace(0, len(values) - 1, sample).astype(np.int64).tolist()]
+    else:
+        items = list(itertools.islice(values, sample))
+    if not items:
+        return 0
+    seen = set()
+    measured = sum(deep_sizeof(v, seen) for v in items)
+    return measured * len(values) // len(items)
+
+
+class Profiler():
+    """
+    Structured profile of one run.
+
+    Records wall and CPU time per phase, the input/output rows and the
+    build/probe split of every semi-join and join edge, and the deep memory of
+    the relations after each phase. By default the memory of the Python objects
+    behind lists of rows and object columns is estimated from a sample of them
+    (see sampled_sizeof); `deep_memory` measures every object exactly, which
+    visits every row. With `trace_memory` the tracemalloc
+    peak of every phase is recorded as well. `report` returns everything as a
+    dictionary and `to_json` exports it, so runs can be compared over time.
+
+    CPU times cover every thread of this process; work done in worker
+    processes only shows up in the wall times.
+    """
+
+    def __init__(self, logger=None, trace_memory=False, deep_memory=False):
+        self.logger = logger
+        self.trace_memory = trace_memory
+        self.deep_memory = deep_memory
+        self.phases = []
+        self.edges = []
+        self.memory = []
+        self.current = None
+        # Seconds spent measuring memory, left out of the run's total
+        self.overhead = 0.0
+        self.started = None
+        self.total = {}
+
+    def start(self):
+        self.started = (time.perf_counter(), time.process_time())
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        """
+        End the run.
+
+        Returns:
+            The total wall time in seconds, without the memory measurements.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.total = {
+            "wall": wall - self.started[0] - self.overhead,
+            "cpu": cpu - self.started[1],
+            "profiling_overhead": self.overhead,
+        }
+        return self.total["wall"]
+
+    @contextmanager
+    def phase(self, name, message=None):
+        """
+        Time the enclosed block as one phase. Edges recorded inside it are attributed to it.
+
+        Args:
+            name: Phase name used in the report.
+            message: Optional log line prefix, followed by the wall time.
+        """
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        previous, self.current = self.current, name
+        wall, cpu = time.perf_counter(), time.process_time()
+        record = {"name": name}
+        try:
+            yield record
+        finally:
+            record["wall"] = time.perf_counter() - wall
+            record["cpu"] = time.process_time() - cpu
+            if self.trace_memory and tracemalloc.is_tracing():
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            self.phases.append(record)
+            self.current = previous
+            if self.logger is not None and message is not None:
+                self.logger.info(f"{message} {record['wall']:.6f} seconds")
+
+    def record_edge(self, left, right, left_key, right_key, rows_in, rows_out, wall, cpu, build=0.0, probe=0.0, **extra):
+        """
+        Record one semi-join or join step of the current phase.
+
+        Args:
+            rows_in: Rows of the reduced (or probing) side before the step.
+            rows_out: Rows after the step.
+            build: Seconds spent building the index / hash table / filter.
+            probe: Seconds spent probing it.
+        """
+        self.edges.append({
+            "phase": self.current,
+            "left": left,
+            "right": right,
+            "left_key": left_key,
+            "right_key": right_key,
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "wall": wall,
+            "cpu": cpu,
+            "build": build,
+            "probe": probe,
+            **extra,
+        })
+
+    @contextmanager
+    def edge(self, left, right, left_key, right_key, rows_in):
+        """
+        Time the enclosed step as an edge. The block fills in `rows_out`, and
+        `build` / `probe` when it can tell them apart.
+        """
+        wall, cpu = time.perf_counter(), time.thread_time()
+        record = {"rows_out": rows_in, "build": 0.0, "probe": 0.0}
+        yield record
+        self.record_edge(
+            left, right, left_key, right_key, rows_in,
+            wall=time.perf_counter() - wall,
+            cpu=time.thread_time() - cpu,
+            **record
+        )
+
+    def record_memory(self, label, relations):
+        """
+        Record the memory of every relation, exact with `deep_memory` and sampled otherwise.
+
+        Returns:
+            The total number of bytes.
+        """
+        started = time.perf_counter()
+        seen = set()
+        total = 0
+        for table, relation in relations.items():
+            size = deep_sizeof(relation, seen) if self.deep_memory else sampled_sizeof(relation)
+            total += size
+            self.memory.append({"phase": label, "table": table, "rows": len(relation), "bytes": size, "deep": self.deep_memory})
+        self.overhead += time.perf_counter() - started
+        return total
+
+    def report(self):
+        """
+        The profile as a JSON-serialisable dictionary.
+        """
+        return {"total": self.total, "phases": self.phases, "edges": self.edges, "memory": self.memory}
+
+    def to_json(self, path=None, indent=2):
+        """
+        Export the report as JSON, written to `path` when given.
+
+        Returns:
+            The JSON string.
+        """
+        text = json.dumps(self.report(), indent=indent, default=str)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+        return text
@@ -0,0 +1,67 @@
+SQL_OPERATORS = {
+    "==": "=",
+    "!=": "<>",
+    ">": ">",
+    "<": "<",
+    ">=": ">=",
+    "<=": "<=",
+    "like": "LIKE",
+    "not like": "NOT LIKE",
+}
+
+
+def compile_condition(condition):
+    """
+    Compile one selection condition into a parameterized SQL predicate.
+
+    Returns:
+        A (sql, params) pair, or None when the operator cannot be pushed down.
+    """
+    column, operator, value = condition["column"], condition["operator"], condition["value"]
+    if operator in ("and", "or"):
+        nested = [compile_condition(c) for c in value]
+        if not nested or any(compiled is None for compiled in nested):
+            return None
+        sql = f" {operator.upper()} ".join(compiled[0] for compiled in nested)
+        return f"({sql})", [param for compiled in nested for param in compiled[1]]
+    if operator == "is null":
+        return f"{column} IS NULL", []
+    if operator == "is not null":
+        return f"{column} IS NOT NULL", []
+    if operator in SQL_OPERATORS:
+        return f"{column} {SQL_OPERATORS[operator]} %s", [value]
+    if operator == "between":
+        return f"{column} BETWEEN %s AND %s", [value[0], value[1]]
+    if operator == "IN":
+        if not value:
+            return "FALSE", []
+        return f"{column} IN %s", [tuple(value)]
+    if operator == "not in":
+        if not value:
+            return f"{column} IS NOT NULL", []
+        return f"{column} NOT IN %s", [tuple(value)]
+    return None
+
+
+def compile_conditions(conditions):
+    """
+    Compile selection conditions into a WHERE clause for PostgreSQL.
+
+    Args:
+        conditions: List of conditions with `column`, `operator` and `value`.
+
+    Returns:
+        A (where_clause, params, remaining) triple. `where_clause` is an empty
+        string when nothing could be pushed down, and `remaining` holds the
+        conditions that still have to be evaluated in Python.
+    """
+    clauses, params, remaining = [], [], []
+    for condition in conditions or []:
+        compiled = compile_condition(condition)
+        if compiled is None:
+            remaining.append(condition)
+            continue
+        clauses.append(compiled[0])
+        params.extend(compiled[1])
+    where_clause = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where_clause, params, remaining
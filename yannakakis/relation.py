@@ -0,0 +1,259 @@
+import sys
+import numpy as np
+
+
+def to_column(values):
+    """
+    Convert a sequence of python values into a column array.
+    Columns holding only integers become int64 arrays, everything else
+    (strings, NULLs, mixed values) is kept as an object array.
+    """
+    if isinstance(values, np.ndarray):
+        return values
+    values = list(values)
+    if values and all(type(v) is int for v in values):
+        return np.array(values, dtype=np.int64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def encode_dictionary(values):
+    """
+    Dictionary-encode a column.
+
+    Returns:
+        (codes, dictionary): int32 codes with -1 for NULL, and the distinct
+        values in order of first appearance as an array.
+    """
+    positions = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values.tolist()):
+        if value is None or value != value:
+            codes[i] = -1
+        else:
+            codes[i] = positions.setdefault(value, len(positions))
+    return codes, to_column(list(positions))
+
+
+def decode_dictionary(codes, dictionary):
+    """
+    Gather the values of dictionary codes, -1 decoding to None.
+    """
+    if len(codes) == 0 or codes.min() >= 0:
+        return dictionary[codes]
+    decoded = np.empty(len(dictionary) + 1, dtype=object)
+    decoded[:len(dictionary)] = dictionary
+    decoded[-1] = None
+    return decoded[codes]
+
+
+def notna_mask(values):
+    """
+    Boolean mask of the non-NULL (and non-NaN) entries of a column.
+    """
+    if values.dtype.kind in "iub":
+        return np.ones(len(values), dtype=bool)
+    if values.dtype.kind == "f":
+        return ~np.isnan(values)
+    return np.fromiter((v is not None and v == v for v in values), dtype=bool, count=len(values))
+
+
+def semi_join_mask(left_keys, right_keys):
+    """
+    Boolean mask over `left_keys` marking the entries present in `right_keys`.
+    """
+    if left_keys.dtype.kind in "iu" and right_keys.dtype.kind in "iu":
+        return np.isin(left_keys, right_keys)
+    valid_keys = set(right_keys.tolist())
+    return np.fromiter((k in valid_keys for k in left_keys.tolist()), dtype=bool, count=len(left_keys))
+
+
+def join_indices(left_keys, right_keys):
+    """
+    Compute the matching row positions of an equi-join.
+
+    Returns:
+        Two int64 arrays (left_idx, right_idx) so that
+        left_keys[left_idx[i]] == right_keys[right_idx[i]] for every output row i.
+    """
+    if left_keys.dtype.kind not in "iu" or right_keys.dtype.kind not in "iu":
+        positions = {}
+        for idx, key in enumerate(right_keys.tolist()):
+            positions.setdefault(key, []).append(idx)
+        left_idx, right_idx = [], []
+        for idx, key in enumerate(left_keys.tolist()):
+            for r in positions.get(key, ()):
+                left_idx.append(idx)
+                right_idx.append(r)
+        return np.array(left_idx, dtype=np.int64), np.array(right_idx, dtype=np.int64)
+
+    order = np.argsort(right_keys, kind="stable")
+    sorted_right = right_keys[order]
+    lo = np.searchsorted(sorted_right, left_keys, side="left")
+    hi = np.searchsorted(sorted_right, left_keys, side="right")
+    counts = hi - lo
+    total = int(counts.sum())
+
+    left_idx = np.repeat(np.arange(len(left_keys), dtype=np.int64), counts)
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(starts, counts) + np.repeat(lo, counts)
+    right_idx = order[offsets]
+    return left_idx, right_idx
+
+
+class ColumnarRelation():
+    """
+    Column oriented relation: one numpy array per column, all of equal length.
+
+    Columns listed in `dictionaries` are dictionary-encoded: the column array
+    holds int32 codes (-1 for NULL) into the dictionary array. Selections,
+    semi-joins and joins work on the codes; `decoded` / `decode` turn them back
+    into values for the final result.
+    """
+
+    def __init__(self, columns, dictionaries=None, length=None):
+        """
+        Args:
+            columns: Dictionary column name -> values.
+            dictionaries: Optional dictionary column name -> dictionary of an encoded column.
+            length: Number of rows of a relation without columns (e.g. a projected COUNT(*)).
+        """
+        self.columns = {name: to_column(values) for name, values in columns.items()}
+        self.dictionaries = {name: d for name, d in (dictionaries or {}).items() if name in self.columns}
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {lengths}")
+        self.length = lengths.pop() if lengths else length or 0
+
+    @classmethod
+    def from_rows(cls, rows, column_names=None):
+        """
+        Build a columnar relation from a list of dictionaries.
+        """
+        if column_names is None:
+            column_names = list(rows[0].keys()) if rows else []
+        return cls({name: [row[name] for row in rows] for name in column_names})
+
+    @classmethod
+    def concat(cls, relations, column_names):
+        """
+        Stack relations with the same columns on top of each other.
+        """
+        if not relations:
+            return cls({name: np.empty(0, dtype=object) for name in column_names})
+        return cls({name: np.concatenate([rel.decoded(name) for rel in relations]) for name in column_names})
+
+    @property
+    def column_names(self):
+        return list(self.columns.keys())
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the column buffers and dictionaries (object arrays count their pointers only).
+        """
+        return sum(values.nbytes for values in self.columns.values()) + sum(d.nbytes for d in self.dictionaries.values())
+
+    def decoded(self, column):
+        """
+        Values of a column, decoding its dictionary codes if it is encoded.
+        """
+        if column in self.dictionaries:
+            return decode_dictionary(self.columns[column], self.dictionaries[column])
+        return self.columns[column]
+
+    def decode(self):
+        """
+        Relation with every dictionary-encoded column turned back into values.
+        """
+        if not self.dictionaries:
+            return self
+        return ColumnarRelation({name: self.decoded(name) for name in self.columns}, length=self.length)
+
+    def encode(self):
+        """
+        Relation with every object (string) column dictionary-encoded.
+        """
+        columns, dictionaries = dict(self.columns), dict(self.dictionaries)
+        for name, values in self.columns.items():
+            if name not in dictionaries and values.dtype.kind == "O":
+                columns[name], dictionaries[name] = encode_dictionary(values)
+        return ColumnarRelation(columns, dictionaries, self.length)
+
+    def rename(self, names):
+        """
+        Relation with the columns renamed through the dictionary old name -> new name.
+        """
+        return ColumnarRelation(
+            {names[name]: values for name, values in self.columns.items()},
+            {names[name]: d for name, d in self.dictionaries.items()},
+            self.length
+        )
+
+    def to_rows(self):
+        """
+        Convert back to the list of dictionaries representation.
+        """
+        names = self.column_names
+        if not names:
+            return [{} for _ in range(self.length)]
+        values = [self.decoded(name).tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def filter(self, mask):
+        """
+        Keep only the rows where `mask` is True.
+        """
+        return ColumnarRelation({name: values[mask] for name, values in self.columns.items()}, self.dictionaries, int(np.count_nonzero(mask)))
+
+    def take(self, indices):
+        """
+        Gather the rows at the given positions (repetitions allowed).
+        """
+        return ColumnarRelation({name: values[indices] for name, values in self.columns.items()}, self.dictionaries, len(indices))
+
+    def project(self, column_names):
+        """
+        Copy-free relation holding only the given columns.
+        """
+        return ColumnarRelation({name: self.columns[name] for name in column_names}, self.dictionaries, self.length)
+
+    def readonly(self):
+        """
+        Copy-free view of the relation whose column buffers cannot be modified.
+        """
+        for values in list(self.columns.values()) + list(self.dictionaries.values()):
+            values.flags.writeable = False
+        return ColumnarRelation(dict(self.columns), self.dictionaries, self.length)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __iter__(self):
+        return iter(self.to_rows())
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.columns) + self.nbytes
+
+    def __repr__(self):
+        return f"ColumnarRelation(rows={self.length}, columns={self.column_names})"
+
+
+def as_columnar(relation, column_names=None):
+    """
+    Return `relation` as a ColumnarRelation, converting a list of dictionaries if needed.
+
+    Args:
+        column_names: Columns of the relation when it is an empty list, which has
+            no row to take them from.
+    """
+    if isinstance(relation, ColumnarRelation):
+        return relation
+    return ColumnarRelation.from_rows(relation, None if relation else column_names)
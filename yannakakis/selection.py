@@ -0,0 +1,241 @@
+import operator as op
+import re
+import numpy as np
+from .relation import ColumnarRelation, semi_join_mask
+
+# Comparisons that numpy can evaluate on a whole numeric column at once
+VECTORIZED_OPERATORS = {"==", "!=", ">", "<", ">=", "<=", "between", "IN", "not in"}
+
+# Operators whose value is a list of nested conditions, possibly on other columns
+COMPOSITE_OPERATORS = {"and", "or"}
+
+
+def is_null(value):
+    """
+    True for NULL (None) and NaN values.
+    """
+    return value is None or value != value
+
+
+def like_matcher(pattern):
+    """
+    Compile a SQL LIKE pattern (`%` any string, `_` any character, `\\` escape)
+    into a str -> bool function. Patterns whose wildcards are only leading or
+    trailing `%` are turned into plain substring / prefix / suffix tests.
+    """
+    core = pattern.strip("%")
+    if not any(c in core for c in "%_\\"):
+        starts, ends = pattern.startswith("%"), pattern.endswith("%") and len(pattern) > 1
+        if starts and ends:
+            return lambda s: core in s
+        if starts:
+            return lambda s: s.endswith(core)
+        if ends:
+            return lambda s: s.startswith(core)
+        return lambda s: s == core
+
+    regex, escaped = [], False
+    for c in pattern:
+        if escaped:
+            regex.append(re.escape(c))
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c == "%":
+            regex.append(".*")
+        elif c == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(c))
+    compiled = re.compile("".join(regex), re.DOTALL)
+    return lambda s: compiled.fullmatch(s) is not None
+
+
+def condition_columns(condition):
+    """
+    Columns read by a condition, including those of nested and/or conditions.
+    """
+    if condition["operator"] in COMPOSITE_OPERATORS:
+        return [column for nested in condition["value"] for column in condition_columns(nested)]
+    return [condition["column"]]
+
+
+def compile_condition(condition):
+    """
+    Compile a single condition into a value -> bool test (for non-NULL values).
+    """
+    operator, value = condition["operator"], condition["value"]
+    if operator == "==":
+        return lambda v: v == value
+    if operator == "!=":
+        return lambda v: v != value
+    if operator == ">":
+        return lambda v: v > value
+    if operator == "<":
+        return lambda v: v < value
+    if operator == ">=":
+        return lambda v: v >= value
+    if operator == "<=":
+        return lambda v: v <= value
+    if operator == "between":
+        lowLimit, highLimit = value[0], value[1]
+        return lambda v: lowLimit <= v <= highLimit
+    if operator == "like":
+        return like_matcher(value)
+    if operator == "not like":
+        matcher = like_matcher(value)
+        return lambda v: not matcher(v)
+    if operator == "IN":
+        values = frozenset(value)
+        return lambda v: v in values
+    if operator == "not in":
+        values = frozenset(value)
+        return lambda v: v not in values
+    return lambda v: True
+
+
+def compile_value_test(conditions):
+    """
+    Fuse all conditions on one column into a single value -> bool test.
+    Rows with a NULL value only pass `is null`.
+    """
+    if any(c["operator"] == "is null" for c in conditions):
+        if all(c["operator"] == "is null" for c in conditions):
+            return is_null
+        return lambda v: False
+    tests = [compile_condition(c) for c in conditions if c["operator"] != "is not null"]
+    if not tests:
+        return lambda v: not is_null(v)
+    if len(tests) == 1:
+        test = tests[0]
+        return lambda v: not is_null(v) and test(v)
+    return lambda v: not is_null(v) and all(test(v) for test in tests)
+
+
+def group_conditions(conditions):
+    """
+    Split conditions into (column -> simple conditions, composite conditions).
+    """
+    grouped, composite = {}, []
+    for condition in conditions:
+        if condition["operator"] in COMPOSITE_OPERATORS:
+            composite.append(condition)
+        else:
+            grouped.setdefault(condition["column"], []).append(condition)
+    return grouped, composite
+
+
+def compile_row_predicate(conditions):
+    """
+    Fuse all conditions of a table into one row -> bool predicate.
+    """
+    grouped, composite = group_conditions(conditions)
+    tests = [(column, compile_value_test(conds)) for column, conds in grouped.items()]
+    for condition in composite:
+        nested = [compile_row_predicate([c]) for c in condition["value"]]
+        combine = any if condition["operator"] == "or" else all
+        tests.append((None, lambda row, nested=nested, combine=combine: combine(test(row) for test in nested)))
+    if len(tests) == 1:
+        column, test = tests[0]
+        if column is None:
+            return test
+        return lambda row: test(row[column])
+    return lambda row: all(test(row) if column is None else test(row[column]) for column, test in tests)
+
+
+def vectorized_mask(values, condition):
+    """
+    Evaluate a comparison on a numeric column without leaving numpy.
+    """
+    operator, value = condition["operator"], condition["value"]
+    if operator == "between":
+        return (values >= value[0]) & (values <= value[1])
+    if operator == ">=":
+        return values >= value
+    if operator == "<=":
+        return values <= value
+    if operator == "IN":
+        return semi_join_mask(values, np.array(list(value)))
+    if operator == "not in":
+        return ~semi_join_mask(values, np.array(list(value)))
+    compare = {"==": op.eq, "!=": op.ne, ">": op.gt, "<": op.lt}[operator]
+    return np.asarray(compare(values, value), dtype=bool)
+
+
+def compile_columnar_predicate(conditions):
+    """
+    Fuse all conditions of a table into one relation -> boolean mask function.
+    Numeric columns are compared with numpy, dictionary-encoded columns test
+    their dictionary only, the other columns are scanned once with the fused
+    per-value test, visiting only rows still alive.
+    """
+    grouped, composite = group_conditions(conditions)
+    plan = [(column, conds, compile_value_test(conds)) for column, conds in grouped.items()]
+    nested = [
+        (condition["operator"], [compile_columnar_predicate([c]) for c in condition["value"]])
+        for condition in composite
+    ]
+
+    def predicate(relation):
+        mask = np.ones(len(relation), dtype=bool)
+        for column, conds, test in plan:
+            values = relation[column]
+            if column in relation.dictionaries:
+                # Test every distinct value once, then gather by code (-1 reads the NULL slot)
+                dictionary = relation.dictionaries[column]
+                matches = np.fromiter((test(v) for v in dictionary.tolist()), dtype=bool, count=len(dictionary))
+                mask &= np.append(matches, test(None))[values]
+                continue
+            if values.dtype.kind in "iu" and all(c["operator"] in ("is null", "is not null") for c in conds):
+                # Integer columns hold no NULLs
+                if any(c["operator"] == "is null" for c in conds):
+                    mask[:] = False
+                continue
+            if values.dtype.kind in "iuf" and all(c["operator"] in VECTORIZED_OPERATORS for c in conds):
+                for condition in conds:
+                    mask &= vectorized_mask(values, condition)
+                if values.dtype.kind == "f":
+                    mask &= ~np.isnan(values)
+                continue
+            alive = np.flatnonzero(mask)
+            keep = np.fromiter((test(v) for v in values[alive]), dtype=bool, count=len(alive))
+            mask[alive[~keep]] = False
+        for operator, predicates in nested:
+            if operator == "or":
+                matched = np.zeros(len(relation), dtype=bool)
+                for nested_predicate in predicates:
+                    matched |= nested_predicate(relation)
+                mask &= matched
+            else:
+                for nested_predicate in predicates:
+                    mask &= nested_predicate(relation)
+        return mask
+
+    return predicate
+
+
+def compile_selection(conditions):
+    """
+    Compile the conditions of a table once into a relation -> relation filter
+    that evaluates every condition in a single pass.
+    """
+    row_predicate = compile_row_predicate(conditions)
+    columnar_predicate = compile_columnar_predicate(conditions)
+
+    def selection(relation):
+        if not conditions:
+            return relation
+        if isinstance(relation, ColumnarRelation):
+            return relation.filter(columnar_predicate(relation))
+        return [row for row in relation if row_predicate(row)]
+
+    return selection
+
+
+def apply_selection(relation, conditions):
+    """
+    Filter rows based on conditions.
+    Each condition is a dictionary with `column`, `operator`, and `value`.
+    The value of an `or` / `and` condition is the list of its nested conditions.
+    """
+    return compile_selection(conditions)(relation)
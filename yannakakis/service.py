@@ -0,0 +1,307 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+from .cache import RelationCache, freeze
+from .engines import ENGINES
+from .planner import referenced_columns
+from .selection import compile_columnar_predicate
+from .stats import collect_statistics
+from .yannakakis import Yannakakis
+
+
+class SharedReductions():
+    """
+    Semi-join results shared by the queries of one batch.
+
+    Every result is computed once: a query asking for a reduction another
+    query is still computing waits for it instead of repeating the work.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.computed = 0
+        self.shared = 0
+
+    def get(self, key, compute):
+        """
+        Returns:
+            (result, computed) where `computed` is True for the caller that ran `compute`.
+        """
+        with self.lock:
+            future = self.entries.get(key)
+            owner = future is None
+            if owner:
+                future = self.entries[key] = Future()
+                self.computed += 1
+            else:
+                self.shared += 1
+        if owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                with self.lock:
+                    self.entries.pop(key, None)
+                future.set_exception(e)
+                raise
+        return future.result(), owner
+
+
+class SharedYannakakis(Yannakakis):
+    """
+    Yannakakis whose semi-joins are looked up in, and added to, a SharedReductions.
+
+    A relation is identified by its signature: the base table scan and
+    selection it comes from, followed by the semi-joins applied to it. Queries
+    reducing the same selected table by the same subtree thus share the result.
+    Relations whose join keys were given query-specific dictionary codes have
+    no signature and are reduced privately.
+    """
+
+    def __init__(self, relations, join_tree, selection_criteria, projection_criteria, logger, logging, applyCardinalityEstimation = True, applyAggregatePushdown = False, statistics = None, reductions = None, signatures = None, **options):
+        """
+        Args:
+            reductions: SharedReductions of the batch.
+            signatures: Dictionary table -> signature of the relation passed for it.
+        """
+        self.reductions = reductions or SharedReductions()
+        self.inputSignatures = signatures or {}
+        # Table -> (signature, relation it describes)
+        self.signatures = {}
+        super().__init__(
+            relations, join_tree, selection_criteria, projection_criteria, logger, logging,
+            applyCardinalityEstimation, applyAggregatePushdown, statistics, **options
+        )
+
+    def signature(self, reduced, table):
+        relation = reduced[table]
+        if table in self.signatures:
+            signature, described = self.signatures[table]
+            return signature if described is relation else None
+        source = self.relations.get(table)
+        if table not in self.inputSignatures or not hasattr(relation, "dictionaries") or not hasattr(source, "dictionaries"):
+            return None
+        # Join key encoding only narrows integer keys, which is described by the dtypes
+        if any(source.dictionaries.get(column) is not dictionary for column, dictionary in relation.dictionaries.items()):
+            return None
+        layout = tuple((column, values.dtype.str) for column, values in relation.columns.items())
+        signature = (self.inputSignatures[table], layout)
+        self.signatures[table] = (signature, relation)
+        return signature
+
+    def reduce_relation(self, reduced, left_table, right_table, left_key, right_key):
+        left_signature, right_signature = self.signature(reduced, left_table), self.signature(reduced, right_table)
+        if left_signature is None or right_signature is None:
+            self.signatures.pop(left_table, None)
+            return super().reduce_relation(reduced, left_table, right_table, left_key, right_key)
+
+        key = ("semi_join", left_signature, left_key, right_signature, right_key, self.approximate and self.falsePositiveRate)
+        started = time.perf_counter()
+        result, computed = self.reductions.get(
+            key, lambda: super(SharedYannakakis, self).reduce_relation(reduced, left_table, right_table, left_key, right_key)
+        )
+        if not computed:
+            self.profiler.record_edge(
+                left_table, right_table, left_key, right_key, len(reduced[left_table]), len(result),
+                wall=time.perf_counter() - started, cpu=0.0, shared=True
+            )
+        self.signatures[left_table] = (key, result)
+        return result
+
+
+class QueryService():
+    """
+    Long-running service executing batches of queries over shared scans.
+
+    For every batch each base table is scanned once with the union of the
+    columns its queries read. All the selections on that table are evaluated
+    in the same pass, every distinct condition once, and queries with the same
+    selection get the same filtered relation. The queries then run concurrently
+    on a thread pool, sharing the semi-join reductions they have in common
+    (see SharedYannakakis). Every batch reports per-query latency and the
+    batch throughput.
+    """
+
+    def __init__(self, source, logger, logging, workers=None, applyCardinalityEstimation=True, applyAggregatePushdown=True):
+        """
+        Args:
+            source: A RelationCache over the database, or a dictionary base table -> ColumnarRelation.
+            workers: Threads running queries and scans, os.cpu_count() by default.
+        """
+        self.source = source
+        self.logger = logger
+        self.logging = logging
+        self.cardinalityEstimation = applyCardinalityEstimation
+        self.aggregatePushdown = applyAggregatePushdown
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        # The database connection behind a RelationCache is not thread-safe
+        self.scanLock = threading.Lock()
+        self.statistics = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def scan(self, table, columns):
+        """
+        One scan of a base table, and the statistics of its columns.
+        """
+        key = (table, tuple(columns))
+        if isinstance(self.source, RelationCache):
+            with self.scanLock:
+                relation = self.source.get(table, columns)
+                statistics = self.source.statistics.get(self.source.key(table, columns, None))
+        else:
+            relation = self.source[table].project(columns).readonly()
+            statistics = None
+        if statistics is None:
+            if key not in self.statistics:
+                self.statistics[key] = collect_statistics(relation.decode())
+            statistics = self.statistics[key]
+        return relation, statistics
+
+    def select(self, relation, selections):
+        """
+        Evaluate every selection on one scanned table in a single pass.
+
+        Args:
+            selections: Dictionary selection key -> conditions.
+
+        Returns:
+            (dictionary selection key -> filtered relation, number of distinct conditions evaluated)
+        """
+        masks = {}
+        for conditions in selections.values():
+            for condition in conditions:
+                frozen = freeze(condition)
+                if frozen not in masks:
+                    masks[frozen] = compile_columnar_predicate([condition])(relation)
+        selected = {}
+        for key, conditions in selections.items():
+            if not conditions:
+                selected[key] = relation
+                continue
+            mask = np.ones(len(relation), dtype=bool)
+            for condition in conditions:
+                mask &= masks[freeze(condition)]
+            selected[key] = relation.filter(mask)
+        return selected, len(masks)
+
+    def prepare(self, queries):
+        """
+        Scan and filter the base tables of a batch.
+
+        Returns:
+            (per query: (relations, statistics, signatures), batch counters)
+        """
+        plans, columns, selections = [], {}, {}
+        for query in queries:
+            tables = getattr(query, "tables", None) or {}
+            needed = referenced_columns(query.columns, query.join_tree, query.selection_criteria, query.projection_criteria)
+            plan = {}
+            for relation_name, column_names in needed.items():
+                base = tables.get(relation_name, relation_name)
+                conditions = query.selection_criteria.get(relation_name, [])
+                selection = frozenset(freeze(condition) for condition in conditions)
+                columns.setdefault(base, {}).update(dict.fromkeys(column_names))
+                selections.setdefault(base, {})[selection] = conditions
+                plan[relation_name] = (base, selection)
+            plans.append(plan)
+
+        def scan_and_select(base):
+            relation, statistics = self.scan(base, list(columns[base]))
+            selected, evaluated = self.select(relation, selections[base])
+            return selected, statistics, evaluated
+
+        scanned = dict(zip(columns, self.executor.map(scan_and_select, columns)))
+        prepared = []
+        for plan in plans:
+            relations, statistics, signatures = {}, {}, {}
+            for relation_name, (base, selection) in plan.items():
+                relations[relation_name] = scanned[base][0][selection]
+                statistics[relation_name] = scanned[base][1]
+                signatures[relation_name] = ("scan", base, tuple(columns[base]), selection)
+            prepared.append((relations, statistics, signatures))
+        counters = {
+            "scans": len(scanned),
+            "conditions": sum(evaluated for _, _, evaluated in scanned.values()),
+            "selections": sum(len(selected) for selected, _, _ in scanned.values()),
+        }
+        return prepared, counters
+
+    def run_query(self, name, query, relations, statistics, signatures, reductions, submitted):
+        if query.engine == "yannakakis":
+            run = SharedYannakakis(
+                relations, query.join_tree, {}, query.projection_criteria, self.logger, self.logging,
+                self.cardinalityEstimation, self.aggregatePushdown, statistics,
+                reductions=reductions, signatures=signatures
+            )
+        else:
+            run = ENGINES[query.engine](
+                relations, query.join_tree, {}, query.projection_criteria, self.logger, self.logging,
+                self.cardinalityEstimation, self.aggregatePushdown
+            )
+        return {
+            "name": name,
+            "engine": query.engine,
+            "result": run.result,
+            "time": run.timeTaken,
+            "latency": time.perf_counter() - submitted,
+            "shared_semi_joins": sum(1 for edge in run.profiler.edges if edge.get("shared")),
+        }
+
+    def execute(self, queries):
+        """
+        Run a batch of queries.
+
+        Args:
+            queries: List of query definitions (JobQuery* or SqlQuery objects), or
+                a dictionary name -> query definition.
+
+        Returns:
+            A report with one entry per query (result, engine time and latency
+            since the batch was submitted), the batch wall time and throughput,
+            and counters of the shared work.
+        """
+        named = list(queries.items()) if isinstance(queries, dict) else [
+            (f"{type(query).__name__}#{i}", query) for i, query in enumerate(queries)
+        ]
+        submitted = time.perf_counter()
+        prepared, counters = self.prepare([query for _, query in named])
+        prepareTime = time.perf_counter() - submitted
+        self.logger.info(f"Shared scans :- {counters['scans']}  conditions evaluated :- {counters['conditions']}  selections :- {counters['selections']}  in {prepareTime:.6f} seconds")
+
+        reductions = SharedReductions()
+        futures = [
+            self.executor.submit(self.run_query, name, query, *plan, reductions, submitted)
+            for (name, query), plan in zip(named, prepared)
+        ]
+        results = [future.result() for future in futures]
+        wall = time.perf_counter() - submitted
+
+        for entry in results:
+            self.logger.info(f"Query {entry['name']} :- latency {entry['latency']:.6f} seconds  result {entry['result']}")
+        throughput = len(results) / wall if wall > 0 else float("inf")
+        self.logger.info(f"Batch of {len(results)} queries :- {wall:.6f} seconds  throughput {throughput:.2f} queries/second")
+        return {
+            "queries": results,
+            "wall": wall,
+            "prepare": prepareTime,
+            "throughput": throughput,
+            "semi_joins": {"computed": reductions.computed, "shared": reductions.shared},
+            **counters,
+        }
+
+    async def execute_async(self, queries):
+        """
+        `execute` for asyncio front-ends, awaited without blocking the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.execute, queries)
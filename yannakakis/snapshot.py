@@ -0,0 +1,154 @@
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from .relation import ColumnarRelation, encode_dictionary, to_column
+
+SNAPSHOT_VERSION = 2
+
+# Dictionary value types stored as strings, and how they are read back
+TAGGED_TYPES = {
+    "datetime": (datetime.datetime, datetime.datetime.fromisoformat),
+    "date": (datetime.date, datetime.date.fromisoformat),
+    "time": (datetime.time, datetime.time.fromisoformat),
+    "decimal": (decimal.Decimal, decimal.Decimal),
+}
+JSON_TYPES = (str, int, float, bool)
+
+
+def snapshot_path(root, table_name, column_names, conditions=None):
+    """
+    Directory holding the snapshot of one table / column set / filter combination.
+    """
+    signature = json.dumps([column_names, conditions or []], sort_keys=True, default=str)
+    digest = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(root, f"{table_name}-{digest}")
+
+
+def dictionary_type(dictionary, name):
+    """
+    Type tag of a dictionary: "json" for values JSON stores as they are, or a TAGGED_TYPES key.
+
+    Raises:
+        TypeError: For values of any other type, or mixing several of these types.
+    """
+    tags = set()
+    for value in dictionary:
+        if value is None:
+            continue
+        if isinstance(value, JSON_TYPES):
+            tags.add("json")
+            continue
+        # datetime is a subclass of date, so it is looked up first
+        tag = next((tag for tag, (kind, _) in TAGGED_TYPES.items() if isinstance(value, kind)), None)
+        if tag is None:
+            raise TypeError(f"Cannot snapshot column {name}: unsupported value {value!r} of type {type(value).__name__}")
+        tags.add(tag)
+    if len(tags) > 1:
+        raise TypeError(f"Cannot snapshot column {name}: mixed value types {sorted(tags)}")
+    return tags.pop() if tags else "json"
+
+
+def write_snapshot(relation, path, table_name):
+    """
+    Write a ColumnarRelation as a typed columnar snapshot.
+
+    Fixed-width columns are stored as raw .npy arrays, every other column as
+    int32 dictionary codes plus a JSON dictionary. Dates, times and decimals
+    are stored as strings with a type tag; other values raise TypeError. The
+    directory is written next to its final location and renamed into place
+    once complete.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    try:
+        columns = write_columns(relation, tmp_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    meta = {"version": SNAPSHOT_VERSION, "table": table_name, "rows": len(relation), "columns": columns}
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def write_columns(relation, tmp_path):
+    """
+    Write the column files of a snapshot, see `write_snapshot`.
+
+    Returns:
+        The column entries of the snapshot's meta.json.
+    """
+    columns = []
+    for position, (name, values) in enumerate(relation.columns.items()):
+        prefix = f"c{position}"
+        if name not in relation.dictionaries and values.dtype.kind in "biuf":
+            np.save(os.path.join(tmp_path, f"{prefix}.npy"), np.ascontiguousarray(values))
+            columns.append({"name": name, "encoding": "array", "file": prefix})
+            continue
+        if name in relation.dictionaries:
+            codes, dictionary = values, relation.dictionaries[name]
+        else:
+            codes, dictionary = encode_dictionary(values)
+        values = dictionary.tolist()
+        value_type = dictionary_type(values, name)
+        if value_type != "json":
+            values = [None if value is None else str(value) for value in values]
+        np.save(os.path.join(tmp_path, f"{prefix}.codes.npy"), np.ascontiguousarray(codes, dtype=np.int32))
+        with open(os.path.join(tmp_path, f"{prefix}.dict.json"), "w", encoding="utf-8") as file:
+            json.dump(values, file)
+        columns.append({"name": name, "encoding": "dictionary", "file": prefix, "type": value_type})
+    return columns
+
+
+def open_dictionary(path, prefix, value_type="json"):
+    codes = np.load(os.path.join(path, f"{prefix}.codes.npy"), mmap_mode="r")
+    with open(os.path.join(path, f"{prefix}.dict.json"), encoding="utf-8") as file:
+        dictionary = json.load(file)
+    if value_type != "json":
+        parse = TAGGED_TYPES[value_type][1]
+        dictionary = [None if value is None else parse(value) for value in dictionary]
+    return codes, to_column(dictionary)
+
+
+def open_snapshot(path):
+    """
+    Open a snapshot written by `write_snapshot`.
+
+    Fixed-width columns and dictionary codes are memory-mapped read-only
+    (zero-copy); dictionary columns stay encoded in the returned relation.
+
+    Returns:
+        A ColumnarRelation.
+    """
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as file:
+        meta = json.load(file)
+    if meta["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta['version']} in {path}")
+
+    columns, dictionaries = {}, {}
+    for column in meta["columns"]:
+        if column["encoding"] == "array":
+            columns[column["name"]] = np.load(os.path.join(path, f"{column['file']}.npy"), mmap_mode="r")
+        else:
+            columns[column["name"]], dictionaries[column["name"]] = open_dictionary(path, column["file"], column["type"])
+    return ColumnarRelation(columns, dictionaries)
+
+
+def has_snapshot(path):
+    """
+    Whether a snapshot of the current version exists, older ones are written again.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as file:
+            return json.load(file)["version"] == SNAPSHOT_VERSION
+    except FileNotFoundError:
+        return False
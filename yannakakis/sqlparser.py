@@ -0,0 +1,297 @@
+import re
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op><=|>=|<>|!=|=|<|>)
+      | (?P<punct>[(),;*])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)?)
+    )""", re.VERBOSE)
+
+COMPARISONS = {"=": "==", "<>": "!=", "!=": "!=", ">": ">", "<": "<", ">=": ">=", "<=": "<="}
+
+KEYWORDS = {"SELECT", "FROM", "WHERE", "AS", "AND", "OR", "NOT", "LIKE", "IN", "BETWEEN", "IS", "NULL"}
+
+
+class SqlSyntaxError(ValueError):
+    """
+    Raised for SQL outside of the supported subset.
+    """
+
+
+def tokenize(sql):
+    """
+    Split a SQL string into (kind, text) tokens.
+    """
+    tokens, position = [], 0
+    sql = sql.rstrip()
+    while position < len(sql):
+        match = TOKEN.match(sql, position)
+        if match is None or match.end() == position:
+            raise SqlSyntaxError(f"Unexpected character at {position}: {sql[position:position + 20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "name" and text.upper() in KEYWORDS:
+            kind, text = "keyword", text.upper()
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+class Parser():
+    """
+    Recursive descent parser for the JOB subset of SQL:
+
+        SELECT COUNT(*) | MIN(a.col) [AS name] | MAX(a.col) | a.col, ...
+        FROM table [AS] alias, ...
+        WHERE conjunction of equi-joins and predicates
+
+    Predicates are comparisons with a literal, [NOT] LIKE, [NOT] IN, BETWEEN,
+    IS [NOT] NULL, and parenthesised AND/OR groups over a single table.
+    """
+
+    def __init__(self, sql):
+        self.tokens = tokenize(sql)
+        self.position = 0
+
+    def peek(self, offset=0):
+        position = self.position + offset
+        return self.tokens[position] if position < len(self.tokens) else (None, None)
+
+    def advance(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, text):
+        if self.peek()[1] == text:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, text):
+        if not self.accept(text):
+            raise SqlSyntaxError(f"Expected {text!r} but found {self.peek()[1]!r}")
+
+    def name(self):
+        kind, text = self.advance()
+        if kind != "name":
+            raise SqlSyntaxError(f"Expected a name but found {text!r}")
+        return text
+
+    def parse(self):
+        """
+        Returns:
+            (select_items, from_items, where) where `where` is a nested
+            ("and" | "or", [...]) / ("compare" | "predicate", ...) tree or None.
+        """
+        self.expect("SELECT")
+        select_items = [self.select_item()]
+        while self.accept(","):
+            select_items.append(self.select_item())
+        self.expect("FROM")
+        from_items = [self.from_item()]
+        while self.accept(","):
+            from_items.append(self.from_item())
+        where = None
+        if self.accept("WHERE"):
+            where = self.disjunction()
+        self.accept(";")
+        if self.peek()[0] is not None:
+            raise SqlSyntaxError(f"Unexpected {self.peek()[1]!r} after the query")
+        return select_items, from_items, where
+
+    def select_item(self):
+        function = self.peek()[1].upper() if self.peek()[0] == "name" else None
+        if function in ("COUNT", "MIN", "MAX") and self.peek(1)[1] == "(":
+            self.position += 2
+            argument = "*" if self.accept("*") else self.name()
+            self.expect(")")
+            # The engines only count rows, and MIN/MAX need a column
+            if (function == "COUNT") != (argument == "*"):
+                raise SqlSyntaxError(f"Unsupported aggregate {function}({argument}), only COUNT(*), MIN(column) and MAX(column) are supported")
+            item = (function, argument)
+        else:
+            item = (None, self.name())
+        if self.accept("AS"):
+            self.name()
+        return item
+
+    def from_item(self):
+        table = self.name()
+        alias = table
+        if self.accept("AS") or self.peek()[0] == "name":
+            alias = self.name()
+        return table, alias
+
+    def disjunction(self):
+        terms = [self.conjunction()]
+        while self.accept("OR"):
+            terms.append(self.conjunction())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def conjunction(self):
+        terms = [self.term()]
+        while self.accept("AND"):
+            terms.append(self.term())
+        return terms[0] if len(terms) == 1 else ("and", terms)
+
+    def term(self):
+        if self.accept("("):
+            node = self.disjunction()
+            self.expect(")")
+            return node
+        if self.peek()[1] == "NOT":
+            raise SqlSyntaxError("NOT is only supported as NOT LIKE / NOT IN / IS NOT NULL")
+        return self.predicate()
+
+    def literal(self):
+        kind, text = self.advance()
+        if kind == "string":
+            return text[1:-1].replace("''", "'")
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        raise SqlSyntaxError(f"Expected a literal but found {text!r}")
+
+    def literal_list(self):
+        self.expect("(")
+        values = [self.literal()]
+        while self.accept(","):
+            values.append(self.literal())
+        self.expect(")")
+        return values
+
+    def predicate(self):
+        column = self.name()
+        kind, text = self.peek()
+        if kind == "op":
+            self.advance()
+            if self.peek()[0] == "name":
+                if text != "=":
+                    raise SqlSyntaxError(f"Only equi-joins are supported, found {column} {text} {self.peek()[1]}")
+                return ("compare", column, self.name())
+            return ("predicate", column, COMPARISONS[text], self.literal())
+        negated = self.accept("NOT")
+        if self.accept("LIKE"):
+            return ("predicate", column, "not like" if negated else "like", self.literal())
+        if self.accept("IN"):
+            return ("predicate", column, "not in" if negated else "IN", self.literal_list())
+        if not negated and self.accept("BETWEEN"):
+            low = self.literal()
+            self.expect("AND")
+            return ("predicate", column, "between", [low, self.literal()])
+        if not negated and self.accept("IS"):
+            operator = "is not null" if self.accept("NOT") else "is null"
+            self.expect("NULL")
+            return ("predicate", column, operator, None)
+        raise SqlSyntaxError(f"Unsupported predicate on {column} at {self.peek()[1]!r}")
+
+
+def conjuncts(node):
+    """
+    Flatten the top-level AND of a WHERE tree, including parenthesised sub-conjunctions.
+    """
+    if node is None:
+        return []
+    if node[0] == "and":
+        return [leaf for child in node[1] for leaf in conjuncts(child)]
+    return [node]
+
+
+class SqlQuery():
+    """
+    Query plan built from SQL, with the same attributes as the `JobQuery*` classes:
+    `columns`, `selection_criteria`, `projection_criteria`, `join_tree`, `engine`
+    and `query`, plus `tables` mapping every relation name to its base table.
+
+    A table used once is named after itself. A table used under several aliases
+    gets one relation per alias, named after the alias.
+    """
+
+    def __init__(self, query, engine="yannakakis"):
+        self.query = query
+        self.engine = engine
+        select_items, from_items, where = Parser(query).parse()
+
+        counts = {}
+        for table, _ in from_items:
+            counts[table] = counts.get(table, 0) + 1
+        self.aliases = {}
+        self.tables = {}
+        for table, alias in from_items:
+            if alias in self.aliases:
+                raise SqlSyntaxError(f"Duplicate alias {alias}")
+            relation = table if counts[table] == 1 else alias
+            self.aliases[alias] = relation
+            self.tables[relation] = table
+
+        self.columns = {relation: [] for relation in self.tables}
+        self.selection_criteria = {}
+        self.projection_criteria = {}
+        self.join_tree = []
+
+        for node in conjuncts(where):
+            if node[0] == "compare":
+                self.add_join(node[1], node[2])
+            else:
+                relation, condition = self.condition(node)
+                self.selection_criteria.setdefault(relation, []).append(condition)
+
+        for function, argument in select_items:
+            if argument == "*":
+                continue
+            relation, column = self.resolve(argument)
+            self.use(relation, column)
+            self.projection_criteria.setdefault(relation, []).append(f"{function}({column})" if function else column)
+
+    def resolve(self, reference):
+        """
+        Map `alias.column` (or a bare column of a single-table query) to (relation, column).
+        """
+        alias, dot, column = reference.rpartition(".")
+        if not dot:
+            if len(self.aliases) != 1:
+                raise SqlSyntaxError(f"Column {reference} must be qualified with a table alias")
+            alias = next(iter(self.aliases))
+        if alias not in self.aliases:
+            raise SqlSyntaxError(f"Unknown table alias {alias} in {reference}")
+        return self.aliases[alias], column
+
+    def use(self, relation, column):
+        if column not in self.columns[relation]:
+            self.columns[relation].append(column)
+
+    def add_join(self, left, right):
+        left_relation, left_key = self.resolve(left)
+        right_relation, right_key = self.resolve(right)
+        if left_relation == right_relation:
+            raise SqlSyntaxError(f"Comparisons between columns of one table are not supported: {left} = {right}")
+        self.use(left_relation, left_key)
+        self.use(right_relation, right_key)
+        self.join_tree.append({"left": left_relation, "right": right_relation, "left_key": left_key, "right_key": right_key})
+
+    def condition(self, node):
+        """
+        Turn a WHERE tree without joins into (relation, condition).
+        """
+        if node[0] == "compare":
+            raise SqlSyntaxError(f"Join predicate {node[1]} = {node[2]} inside an OR group")
+        if node[0] == "predicate":
+            _, reference, operator, value = node
+            relation, column = self.resolve(reference)
+            self.use(relation, column)
+            return relation, {"column": column, "operator": operator, "value": value}
+
+        nested = [self.condition(child) for child in node[1]]
+        relations = {relation for relation, _ in nested}
+        if len(relations) != 1:
+            raise SqlSyntaxError(f"{node[0].upper()} groups over several tables are not supported")
+        return relations.pop(), {"column": None, "operator": node[0], "value": [c for _, c in nested]}
+
+
+def parse_query(query, engine="yannakakis"):
+    """
+    Parse a SQL query into a plan object usable wherever a `JobQuery*` instance is.
+    """
+    return SqlQuery(query, engine)
@@ -0,0 +1,104 @@
+from collections import Counter
+import numpy as np
+from .relation import as_columnar, notna_mask
+
+
+class ColumnStatistics():
+    """
+    Summary of one column: row/NULL/distinct counts, the most common values with
+    their frequencies and an equi-depth histogram (numeric columns only).
+    """
+
+    def __init__(self, row_count, null_count, distinct_count, most_common, histogram):
+        self.row_count = row_count
+        self.null_count = null_count
+        self.distinct_count = distinct_count
+        self.most_common = most_common
+        self.histogram = histogram
+
+    def frequency(self, value):
+        """
+        Estimated fraction of the rows holding `value`.
+        """
+        if value in self.most_common:
+            return self.most_common[value]
+        rest_rows = 1.0 - sum(self.most_common.values()) - self.null_fraction
+        rest_distinct = self.distinct_count - len(self.most_common)
+        return max(rest_rows, 0.0) / rest_distinct if rest_distinct > 0 else 0.0
+
+    @property
+    def null_fraction(self):
+        return self.null_count / self.row_count if self.row_count else 0.0
+
+    def range_fraction(self, low=None, high=None):
+        """
+        Estimated fraction of the rows with low <= value <= high, read off the histogram.
+        """
+        if self.histogram is None or len(self.histogram) < 2:
+            return 1.0 - self.null_fraction
+        bounds = self.histogram
+        low = bounds[0] if low is None else low
+        high = bounds[-1] if high is None else high
+        if high < low:
+            return 0.0
+        covered = 0.0
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi < low or lo > high:
+                continue
+            width = hi - lo
+            if width <= 0:
+                covered += 1.0
+            else:
+                covered += (min(hi, high) - max(lo, low)) / width
+        return covered / (len(bounds) - 1) * (1.0 - self.null_fraction)
+
+    def scaled(self, row_count):
+        """
+        Statistics for the same column after a filter kept `row_count` rows.
+        """
+        return ColumnStatistics(
+            row_count,
+            min(self.null_count, row_count),
+            max(min(self.distinct_count, row_count), 1 if row_count else 0),
+            self.most_common,
+            self.histogram
+        )
+
+    def __repr__(self):
+        return f"ColumnStatistics(rows={self.row_count}, distinct={self.distinct_count}, nulls={self.null_count})"
+
+
+def collect_column_statistics(values, mcv_count=10, histogram_buckets=20):
+    """
+    Compute the statistics of one column array.
+    """
+    valid = notna_mask(values)
+    present = values[valid]
+    row_count, null_count = len(values), int(len(values) - valid.sum())
+
+    if present.dtype.kind in "iuf":
+        distinct, counts = np.unique(present, return_counts=True)
+        top = np.argsort(counts, kind="stable")[::-1][:mcv_count]
+        most_common = {distinct[i].item(): counts[i] / row_count for i in top}
+        histogram = None
+        if len(present):
+            quantiles = np.linspace(0, 1, histogram_buckets + 1)
+            histogram = np.quantile(present, quantiles)
+        return ColumnStatistics(row_count, null_count, len(distinct), most_common, histogram)
+
+    counts = Counter(present.tolist())
+    most_common = {value: count / row_count for value, count in counts.most_common(mcv_count)}
+    return ColumnStatistics(row_count, null_count, len(counts), most_common, None)
+
+
+def collect_statistics(relation, column_names=None):
+    """
+    Compute the statistics of every (or the given) column of a relation.
+
+    Returns:
+        A dictionary column -> ColumnStatistics.
+    """
+    relation = as_columnar(relation)
+    if column_names is None:
+        column_names = relation.column_names
+    return {column: collect_column_statistics(relation.decoded(column)) for column in column_names}
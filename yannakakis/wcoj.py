@@ -0,0 +1,245 @@
+import time
+import numpy as np
+from .aggregate import combine, is_aggregate_query, parse_aggregates, projected_columns
+from .encoding import encode_join_keys
+from .planner import query_columns, table_attributes
+from .profiling import Profiler
+from .relation import ColumnarRelation, as_columnar, notna_mask
+from .selection import apply_selection
+
+
+class SortedTrie():
+    """
+    A relation sorted lexicographically on its join variables. Every trie node is
+    a row range [lo, hi) of the sorted columns; its children are the distinct
+    values of the next column inside that range.
+    """
+
+    def __init__(self, relation, columns):
+        self.columns = columns
+        keys = [relation[col] for col in columns]
+        self.order = np.lexsort(keys[::-1]) if keys else np.arange(len(relation))
+        self.levels = [values[self.order] for values in keys]
+
+    def values(self, level, lo, hi):
+        """
+        Distinct values of `level` inside the row range.
+        """
+        values = self.levels[level][lo:hi]
+        if len(values) == 0:
+            return values
+        return values[np.r_[True, values[1:] != values[:-1]]]
+
+    def narrow(self, level, lo, hi, value):
+        """
+        Sub-range of the rows whose `level` column equals `value`.
+        """
+        values = self.levels[level][lo:hi]
+        return lo + int(np.searchsorted(values, value, "left")), lo + int(np.searchsorted(values, value, "right"))
+
+    def narrow_all(self, level, lo, hi, values):
+        """
+        Vectorized `narrow` for many values at once.
+        """
+        column = self.levels[level][lo:hi]
+        return lo + np.searchsorted(column, values, "left"), lo + np.searchsorted(column, values, "right")
+
+
+def intersect(candidates, tries):
+    """
+    Leapfrog-style intersection: keep the candidates present in every other trie range.
+    """
+    for trie, level, lo, hi in tries:
+        if len(candidates) == 0:
+            break
+        column = trie.levels[level][lo:hi]
+        positions = np.minimum(np.searchsorted(column, candidates), max(len(column) - 1, 0))
+        candidates = candidates[column[positions] == candidates] if len(column) else candidates[:0]
+    return candidates
+
+
+class GenericJoin():
+    """
+    Worst-case optimal join (Generic Join over sorted tries, Leapfrog Triejoin style).
+
+    Equi-join predicates are merged into join variables. Every relation is sorted
+    into a trie on its variables, and the join binds one variable at a time by
+    intersecting the candidate values of all relations that contain it. Cyclic
+    queries therefore run within the AGM bound instead of blowing up pairwise.
+    Takes the same query objects as `Yannakakis` so both can be compared directly.
+    """
+
+    def __init__(self, relations, join_tree, selection_criteria, projection_criteria, logger, logging, applyCardinalityEstimation = True, applyAggregatePushdown = False, traceMemory = False, deepMemory = False):
+        self.relations = relations
+        self.join_tree = join_tree
+        self.selection_criteria = selection_criteria
+        self.projection_criteria = projection_criteria
+        self.logger = logger
+        self.logging = logging
+        self.cardinalityEstimation = applyCardinalityEstimation
+        self.aggregatePushdown = applyAggregatePushdown
+        self.timeTaken = None
+        # Structured timings and memory of the run, see profiling.Profiler
+        self.profiler = Profiler(logger, traceMemory, deepMemory)
+        self.result = self.generic_join(self.relations, self.join_tree, self.selection_criteria, self.projection_criteria)
+
+    def variable_order(self, relations, table_columns):
+        """
+        Order the join variables: shared by most relations first, then smallest domain.
+        """
+        variables = {}
+        for table, columns in table_columns.items():
+            for variable, column in columns.items():
+                variables.setdefault(variable, []).append((table, column))
+
+        def rank(variable):
+            members = variables[variable]
+            domain = 0
+            if self.cardinalityEstimation:
+                domain = min(len(np.unique(relations[table][column])) for table, column in members)
+            return (-len(members), domain)
+
+        return sorted(variables, key=rank)
+
+    def generic_join(self, relations, join_tree, selection_criteria, projection_criteria):
+        profiler = self.profiler
+        profiler.start()
+        self.logger.info(f"Generic Join started at : {time.time():.6f} seconds")
+
+        with profiler.phase("selection", "Time taken to Selections :- "):
+            columns = query_columns(join_tree, selection_criteria, projection_criteria)
+            relations = {table: as_columnar(rel, columns.get(table)) for table, rel in relations.items()}
+            for table_name, conditions in selection_criteria.items():
+                relations[table_name] = apply_selection(relations[table_name], conditions)
+            # Tries are built over compact keys that compare equal across relations
+            relations = encode_join_keys(relations, join_tree)
+        profiler.record_memory("Memory Usage After Selections", relations)
+
+        with profiler.phase("build_tries", "Time taken to build tries :- "):
+            # Relations without a join variable get a trie with no levels: all of
+            # their rows take part in every binding
+            table_columns = {table: {} for table in relations}
+            table_columns.update(table_attributes(join_tree))
+            order = self.variable_order(relations, table_columns)
+            self.logger.info(f"Variable order :- {order}")
+
+            tries = {}
+            for table, columns in table_columns.items():
+                ordered = [columns[v] for v in order if v in columns]
+                tries[table] = SortedTrie(relations[table], ordered)
+
+        aggregateOnly = self.aggregatePushdown and is_aggregate_query(projection_criteria)
+        with profiler.phase("aggregate" if aggregateOnly else "join", "Time taken to perform generic join :- "):
+            if aggregateOnly:
+                result = self.aggregate(tries, relations, table_columns, order, projection_criteria)
+            else:
+                result = self.materialize(tries, relations, table_columns, order, projection_criteria)
+
+        self.timeTaken = profiler.stop()
+        profiler.record_memory("Final Result", {"result": result})
+        self.logger.info(f"Overall time taken by Generic Join :- {self.timeTaken:.6f} seconds")
+        self.logger.info(f"Length of Final Join : {len(result)}")
+        return result
+
+    def bindings(self, tries, table_columns, order, depth, ranges, emit, vectorize_last=False):
+        """
+        Enumerate the bindings of the variables from `depth` on.
+
+        Args:
+            ranges: Dictionary table -> (level, lo, hi), the current trie node.
+            emit: Called with the final ranges of every full binding, or with
+                (ranges, values, bounds) for the last variable when `vectorize_last`.
+        """
+        if depth == len(order):
+            emit(ranges)
+            return
+        variable = order[depth]
+        members = [table for table in tries if variable in table_columns[table]]
+        participants = sorted(
+            ((tries[table], *ranges[table]) for table in members),
+            key=lambda item: item[3] - item[2]
+        )
+        smallest, level, lo, hi = participants[0]
+        candidates = intersect(smallest.values(level, lo, hi), participants[1:])
+
+        if vectorize_last and depth == len(order) - 1:
+            bounds = {table: tries[table].narrow_all(ranges[table][0], ranges[table][1], ranges[table][2], candidates) for table in members}
+            emit(ranges, candidates, bounds)
+            return
+
+        for value in candidates.tolist():
+            narrowed = dict(ranges)
+            for table in members:
+                level, lo, hi = ranges[table]
+                narrowed[table] = (level + 1, *tries[table].narrow(level, lo, hi, value))
+            self.bindings(tries, table_columns, order, depth + 1, narrowed, emit, vectorize_last)
+
+    def aggregate(self, tries, relations, table_columns, order, projection_criteria):
+        """
+        COUNT(*) and MIN/MAX without listing the join results: the multiplicity of
+        a binding is the product of the row counts left in every trie node.
+        """
+        aggregates = parse_aggregates(projection_criteria)
+        sorted_values = {
+            label: (func, table, relations[table].decoded(column)[tries[table].order])
+            for label, func, table, column in aggregates
+        }
+        totals = {"COUNT(*)": 0, **{label: None for label, _, _, _ in aggregates}}
+
+        def fold(label, func, values):
+            values = values[notna_mask(values)]
+            for v in values.tolist():
+                totals[label] = combine(func, totals[label], v)
+
+        def emit(ranges, candidates=None, bounds=None):
+            if candidates is None:
+                counts = np.prod([hi - lo for _, lo, hi in ranges.values()])
+                totals["COUNT(*)"] += int(counts)
+                if counts > 0:
+                    for label, (func, table, values) in sorted_values.items():
+                        _, lo, hi = ranges[table]
+                        fold(label, func, values[lo:hi])
+                return
+            counts = np.ones(len(candidates), dtype=np.int64)
+            for table, (_, lo, hi) in ranges.items():
+                if table in bounds:
+                    counts *= bounds[table][1] - bounds[table][0]
+                else:
+                    counts *= hi - lo
+            totals["COUNT(*)"] += int(counts.sum())
+            for label, (func, table, values) in sorted_values.items():
+                for i in np.flatnonzero(counts).tolist():
+                    lo, hi = (bounds[table][0][i], bounds[table][1][i]) if table in bounds else ranges[table][1:]
+                    fold(label, func, values[lo:hi])
+
+        ranges = {table: (0, 0, len(relations[table])) for table in tries}
+        self.bindings(tries, table_columns, order, 0, ranges, emit, vectorize_last=True)
+        return [totals]
+
+    def materialize(self, tries, relations, table_columns, order, projection_criteria):
+        """
+        List the join results, gathering the projected `table.column` columns at the end.
+        """
+        tables = list(tries)
+        positions = {table: [] for table in tables}
+
+        def emit(ranges):
+            sizes = [ranges[table][2] - ranges[table][1] for table in tables]
+            if 0 in sizes:
+                return
+            grid = np.indices(sizes).reshape(len(tables), -1)
+            for i, table in enumerate(tables):
+                positions[table].append(tries[table].order[ranges[table][1] + grid[i]])
+
+        ranges = {table: (0, 0, len(relations[table])) for table in tables}
+        self.bindings(tries, table_columns, order, 0, ranges, emit)
+
+        rows = {
+            table: np.concatenate(positions[table]) if positions[table] else np.empty(0, dtype=np.int64)
+            for table in tables
+        }
+        columns = {}
+        for table, projected in projected_columns(projection_criteria).items():
+            for column in projected:
+                columns[f"{table}.{column}"] = relations[table].decoded(column)[rows[table]]
+        return ColumnarRelation(columns, length=len(rows[tables[0]]) if tables else 0)
@@ -1,11 +1,20 @@
 import time
-import sys
-import pandas as pd
 from collections import defaultdict
+import numpy as np
+from .aggregate import aggregate_phase, is_aggregate_query, projected_columns
+from .bloom import BlockedBloomFilter
+from .encoding import encode_join_keys
+from .executor import ParallelReducer
+from .index import IndexRegistry
+from .optimizer import JoinOrderOptimizer
+from .planner import build_join_tree, query_columns
+from .profiling import Profiler
+from .relation import ColumnarRelation, as_columnar, join_indices, semi_join_mask
+from .selection import apply_selection, is_null
 
 
 class Yannakakis():
-    def __init__(self, relations, join_tree, selection_criteria, projection_criteria, logger, logging, applyCardinalityEstimation = True):
+    def __init__(self, relations, join_tree, selection_criteria, projection_criteria, logger, logging, applyCardinalityEstimation = True, applyAggregatePushdown = False, statistics = None, workers = None, applyBloomFilter = False, falsePositiveRate = 0.01, traceMemory = False, deepMemory = False):
         self.relations = relations
         self.join_tree = join_tree
         self.selection_criteria = selection_criteria
@@ -13,16 +22,32 @@ class Yannakakis():
         self.logger = logger
         self.logging = logging
         self.cardinalityEstimation = applyCardinalityEstimation
+        self.aggregatePushdown = applyAggregatePushdown
+        self.statistics = statistics
+        self.workers = workers
+        self.bloomFilter = applyBloomFilter
+        self.falsePositiveRate = falsePositiveRate
+        # Set while the semi-join passes run on Bloom filters, see reduce_relation
+        self.approximate = False
+        self.bloomReport = []
+        # Structured timings, cardinalities and memory of the run, see profiling.Profiler
+        self.profiler = Profiler(logger, traceMemory, deepMemory)
+        self.reducer = None
+        self.indexes = None
         self.timeTaken = None
-        self.yannakakis(self.relations, self.join_tree ,self.selection_criteria, self.projection_criteria)
+        self.result = self.yannakakis(self.relations, self.join_tree ,self.selection_criteria, self.projection_criteria)
     
     def bottom_up_semi_join(self, reduced, join_tree):
+        if self.reducer is not None:
+            # Bloom filter passes are not hash-partitioned across processes
+            return self.reducer.bottom_up(reduced, join_tree, partition=not self.approximate)
         for edge in reversed(join_tree):
             '''reduced[movieinfoidx] = semijoin(reduced[movieindexleft], reduced[info_type], info_type_id, id)'''
             initialCount = len(reduced[edge["left"]])
-            reduced[edge["left"]] = self.semi_join(
-                reduced[edge["left"]],
-                reduced[edge["right"]],
+            reduced[edge["left"]] = self.reduce_relation(
+                reduced,
+                edge["left"],
+                edge["right"],
                 edge["left_key"],
                 edge["right_key"]
             )
@@ -31,11 +56,14 @@ class Yannakakis():
         return reduced
 
     def top_down_semi_join(self, reduced, join_tree):
+        if self.reducer is not None:
+            return self.reducer.top_down(reduced, join_tree, partition=not self.approximate)
         for edge in join_tree:
             initialCount = len(reduced[edge["right"]])
-            reduced[edge["right"]] = self.semi_join(
-                reduced[edge["right"]],
-                reduced[edge["left"]],
+            reduced[edge["right"]] = self.reduce_relation(
+                reduced,
+                edge["right"],
+                edge["left"],
                 edge["right_key"],
                 edge["left_key"]
             )
@@ -43,68 +71,181 @@ class Yannakakis():
             self.logger.info(f"TOP DOWN :- {edge}  Dangling tuples removed :- {danglingTuples}")
         return reduced
 
-    def join_phase(self, reduced, join_tree):
+    def reduce_relation(self, reduced, left_table, right_table, left_key, right_key):
         """
-        Alternative join approach with explicit step-by-step joining
+        Semi-join reduced[left_table] by reduced[right_table], probing the shared
+        key index of the right table and filtering the left table's indexes along.
         """
-        # Track intermediate results
-        intermediate = {}
-        joined_result = []
+        left, right = reduced[left_table], reduced[right_table]
+        with self.profiler.edge(left_table, right_table, left_key, right_key, len(left)) as record:
+            if (self.approximate and isinstance(left, ColumnarRelation)
+                    and left[left_key].dtype.kind in "iu" and right[right_key].dtype.kind in "iu"):
+                result = self.bloom_semi_join(left, right, left_table, right_table, left_key, right_key, record)
+            else:
+                result = self.exact_semi_join(left, right, left_table, right_table, left_key, right_key, record)
+            record["rows_out"] = len(result)
+        return result
 
-        for edge in join_tree:
-            # Use either existing result or the relation from reduced
-            left_data = intermediate.get(edge["left"], reduced[edge["left"]])
-            right_data = reduced[edge["right"]]
-            # right_data = intermediate.get(edge["right"], reduced[edge["right"]])
-            
-            # Perform join
-            joined_result = self.join(
-                left_data,
-                right_data,
-                edge["left_key"],
-                edge["right_key"]
-            )
-            
-            # Store result for potential next joins
-            intermediate[edge["right"]] = joined_result
-            intermediate[edge["left"]] = joined_result
-        
-        # Return the final joined result
-        return joined_result
-    
-    # Supporting Functions
-    def join(self, left, right, left_key, right_key):
+    def exact_semi_join(self, left, right, left_table, right_table, left_key, right_key, record):
         """
-        Perform a full join, merging rows from `left` and `right`.
+        Semi-join through the shared key index, filling in the build/probe times of `record`.
         """
-        if left_key not in left[0] or right_key not in right[0]:
-            raise KeyError(f"Key '{left_key}' or '{right_key}' missing in relations.")
-        
-        # Create a dictionary for faster lookup on the right side
-        # right_dict = {r[right_key]: r for r in right}
-        right_dict = defaultdict(list)
-        for r in right:
-            right_dict[r[right_key]].append(r)
-        
-        result = []
-        for l in left:
-            matching_rows = right_dict.get(l[left_key], [])
-            for r in matching_rows:
-                merged_row = {**l, **r}
-                result.append(merged_row)
-            # if l[left_key] in right_dict:
-            #     merged_row = {**l, **right_dict[l[left_key]]}  # Merge the rows where keys match O(1) lookup
-            #     result.append(merged_row)
-    
+        buildStart = time.perf_counter()
+        index = None
+        if self.indexes is not None and isinstance(left, ColumnarRelation):
+            index = self.indexes.get(right_table, right_key, right)
+        probeStart = time.perf_counter()
+        record["build"] = probeStart - buildStart
+        if index is None:
+            result = self.semi_join(left, right, left_key, right_key)
+        else:
+            mask = index.contains(left[left_key])
+            result = left.filter(mask)
+            self.indexes.filter(left_table, left, mask, result)
+        record["probe"] = time.perf_counter() - probeStart
         return result
 
+    def bloom_semi_join(self, left, right, left_table, right_table, left_key, right_key, record=None):
+        """
+        Approximate semi-join: keep the rows of `left` whose key may be in a
+        blocked Bloom filter over the keys of `right`. Never drops a matching
+        row, but lets a fraction `falsePositiveRate` of the dangling rows through.
+        """
+        capacity = None
+        stats = (self.statistics or {}).get(right_table, {}).get(right_key)
+        if stats is not None:
+            capacity = stats.distinct_count
+        buildStart = time.perf_counter()
+        bloom = BlockedBloomFilter.build(right[right_key], self.falsePositiveRate, capacity)
+        probeStart = time.perf_counter()
+        mask = bloom.contains(left[left_key])
+        result = left.filter(mask)
+        if record is not None:
+            record.update(build=probeStart - buildStart, probe=time.perf_counter() - probeStart, filter_bytes=bloom.nbytes, hashes=bloom.hashes)
+        self.bloomReport.append({
+            "left": left_table,
+            "right": right_table,
+            "filter_bytes": bloom.nbytes,
+            "hashes": bloom.hashes,
+            "rows_before": len(left),
+            "rows_after": len(result),
+        })
+        self.logger.info(f"BLOOM :- {left_table}.{left_key} by {right_table}.{right_key}  Filter size :- {bloom.nbytes / 1024:.2f} KB  Rows pruned :- {len(left) - len(result)} of {len(left)}")
+        return result
+
+    def join_phase(self, reduced, join_tree, projection_criteria=None):
+        """
+        Join the reduced relations along the tree, parents before children.
+
+        Only row ids are carried through the joins, one per relation and result
+        row, and the columns requested by `projection_criteria` are gathered
+        once at the end as `table.column`. Without a projection the result keeps
+        its row count but no columns. Without joins the result is the rows of
+        the query's single relation.
+        """
+        if not join_tree and len(reduced) != 1:
+            raise ValueError(f"Tables {list(reduced)} are not connected by any join predicate.")
+        row_ids = self.join_row_ids(reduced, join_tree)
+        return self.materialize(reduced, row_ids, projected_columns(projection_criteria or {}))
+
+    def join_row_ids(self, reduced, join_tree):
+        """
+        Row ids of the join results.
+
+        Returns:
+            A dictionary table -> row ids (int64 array, or list for list relations).
+        """
+        root = join_tree[0]["left"] if join_tree else next(iter(reduced))
+        if not isinstance(reduced[root], ColumnarRelation):
+            return self.join_row_ids_list(reduced, join_tree)
+
+        row_ids = {root: np.arange(len(reduced[root]), dtype=np.int64)}
+        for edge in join_tree:
+            parent, child = reduced[edge["left"]], reduced[edge["right"]]
+            rows_in = len(row_ids[edge["left"]])
+            with self.profiler.edge(edge["left"], edge["right"], edge["left_key"], edge["right_key"], rows_in) as record:
+                buildStart = time.perf_counter()
+                right_index = None
+                if self.indexes is not None:
+                    right_index = self.indexes.get(edge["right"], edge["right_key"], child)
+                probeStart = time.perf_counter()
+                probe_keys = parent[edge["left_key"]][row_ids[edge["left"]]]
+                if right_index is not None:
+                    probe_idx, child_idx = right_index.join_indices(probe_keys)
+                else:
+                    probe_idx, child_idx = join_indices(probe_keys, child[edge["right_key"]])
+                row_ids = {table: ids[probe_idx] for table, ids in row_ids.items()}
+                row_ids[edge["right"]] = child_idx
+                record.update(rows_out=len(child_idx), build=probeStart - buildStart, probe=time.perf_counter() - probeStart)
+        return row_ids
+
+    def join_row_ids_list(self, reduced, join_tree):
+        """
+        `join_row_ids` for relations given as lists of dictionaries.
+        """
+        root = join_tree[0]["left"] if join_tree else next(iter(reduced))
+        tables = [root]
+        tuples = [(i,) for i in range(len(reduced[root]))]
+        for edge in join_tree:
+            parent, child = reduced[edge["left"]], reduced[edge["right"]]
+            position = tables.index(edge["left"])
+            with self.profiler.edge(edge["left"], edge["right"], edge["left_key"], edge["right_key"], len(tuples)) as record:
+                buildStart = time.perf_counter()
+                # NULL keys never match, as on the columnar path where encode_join_keys drops them
+                child_rows = defaultdict(list)
+                for idx, row in enumerate(child):
+                    if not is_null(row[edge["right_key"]]):
+                        child_rows[row[edge["right_key"]]].append(idx)
+                probeStart = time.perf_counter()
+                tuples = [
+                    ids + (idx,)
+                    for ids in tuples
+                    for idx in child_rows.get(parent[ids[position]][edge["left_key"]], ())
+                ]
+                record.update(rows_out=len(tuples), build=probeStart - buildStart, probe=time.perf_counter() - probeStart)
+            tables.append(edge["right"])
+        return {table: [ids[i] for ids in tuples] for i, table in enumerate(tables)}
+
+    def materialize(self, reduced, row_ids, columns):
+        """
+        Gather the requested columns of the join results.
+
+        Args:
+            row_ids: Dictionary table -> row ids, as returned by `join_row_ids`.
+            columns: Dictionary table -> columns to gather.
+        """
+        tables = list(row_ids)
+        length = len(row_ids[tables[0]])
+        if not isinstance(reduced[tables[0]], ColumnarRelation):
+            result = [{} for _ in range(length)]
+            for table, cols in columns.items():
+                relation = reduced[table]
+                for row, idx in zip(result, row_ids[table]):
+                    for col in cols:
+                        row[f"{table}.{col}"] = relation[idx][col]
+            return result
+
+        gathered, dictionaries = {}, {}
+        for table, cols in columns.items():
+            relation = reduced[table]
+            for col in cols:
+                gathered[f"{table}.{col}"] = relation[col][row_ids[table]]
+                if col in relation.dictionaries:
+                    dictionaries[f"{table}.{col}"] = relation.dictionaries[col]
+        return ColumnarRelation(gathered, dictionaries, length)
+
+    # Supporting Functions
     def semi_join(self, left, right, left_key, right_key):
         """
         Perform semi-join without reducing columns.
         Filters rows in `left` based on matching keys in `right`.
         """
         '''reduced[movieinfoidx] = semijoin(reduced[movieindexleft], reduced[info_type], info_type_id, id)'''
-        valid_keys = {row[right_key] for row in right}
+        if isinstance(left, ColumnarRelation):
+            return left.filter(semi_join_mask(left[left_key], right[right_key]))
+
+        # NULL keys match nothing
+        valid_keys = {row[right_key] for row in right if not is_null(row[right_key])}
         # Keep all columns from `left`
         return [row for row in left if row[left_key] in valid_keys]
 
@@ -113,40 +254,7 @@ class Yannakakis():
         Filter rows based on conditions.
         Each condition is a dictionary with `column`, `operator`, and `value`.
         """
-        # print(f"Relation: {relation}")
-        # print(f"Conditions: {conditions}")
-
-        for condition in conditions:
-            column, operator, value = condition["column"], condition["operator"], condition["value"]
-            relation = [row for row in relation if pd.notna(row[column])]  # Skip rows where column value is NaN
-            if operator == "==":
-                relation = [row for row in relation if row[column] == value]
-            elif operator == "!=":
-                relation = [row for row in relation if row[column] != value]
-            elif operator == ">":
-                relation = [row for row in relation if row[column] > value]
-            elif operator == "<":
-                relation = [row for row in relation if row[column] < value]
-            elif operator == "between":
-                lowLimit, highLimit = value[0], value[1]
-                relation = [row for row in relation if row[column] >= lowLimit and row[column] <= highLimit]
-            elif operator == "like":
-                res = []
-                for row in relation:
-                    if value.replace("%", "") in row[column]:
-                        res.append(row)
-                relation = res
-            elif operator == "not like":
-                res = []
-                for row in relation:
-                    if value.replace("%", "") not in row[column]:
-                        res.append(row)
-                relation = res
-            elif operator == "IN":
-                relation = [row for row in relation if row[column] in value]
-            elif operator == "not in":
-                relation = [row for row in relation if row[column] not in value]
-        return relation
+        return apply_selection(relation, conditions)
 
     def apply_projection(self, relation, columns):
         """
@@ -184,85 +292,118 @@ class Yannakakis():
             join_tree: A list of join edges with `left`, `right`, `left_key`, `right_key`.
 
         Returns:
-            A reordered join tree based on estimated cardinalities.
+            The join tree rooted and ordered by the cost-based optimizer, using the
+            column statistics passed to the constructor when available.
         """
-        # Annotate join_tree with estimated cardinalities
-        join_order = []
-        for edge in join_tree:
-            left_cardinality = self.estimate_cardinality(relations[edge["left"]])
-            right_cardinality = self.estimate_cardinality(relations[edge["right"]])
-            edge["left_cardinality"] = left_cardinality
-            edge["right_cardinality"] = right_cardinality
-            join_order.append(edge)
-
-        # Sort join tree by the sum of cardinalities (smallest relations first)
-        join_order.sort(key=lambda edge: edge["left_cardinality"] + edge["right_cardinality"])
-
-        return join_order
-
-    def calculateTimeInterval(self, prevTime, msg):
-        curTime = time.time()
-        timeDiff = curTime - prevTime
-        self.logger.info(f"{msg} {timeDiff:.6f} seconds")
-        if msg == "Overall time taken by Yannakakis algirithm :- ":
-            self.timeTaken = timeDiff
-        return time.time()
+        optimizer = JoinOrderOptimizer(relations, self.statistics)
+        join_tree = optimizer.optimize(join_tree)
+        self.logger.info(f"Estimated join cost :- {optimizer.estimated_cost:.1f}")
+        return join_tree
 
     def measure_memory(self, relations, phase):
         """
-        Measure and print the memory usage of all relations at a given phase.
+        Record and log the memory usage of all relations at a given phase (deep with `deepMemory`).
         """
-        total_size = sum(sys.getsizeof(rel) for rel in relations.values())
+        total_size = self.profiler.record_memory(phase, relations)
         self.logger.info(f"{phase} - Total Memory Usage: {total_size / 1024:.2f} KB")
-        for name, rel in relations.items():
-            self.logger.info(f"Relation {name}: {sys.getsizeof(rel) / 1024:.2f} KB")
+        for entry in self.profiler.memory[-len(relations):] if relations else []:
+            self.logger.info(f"Relation {entry['table']}: {entry['rows']} rows {entry['bytes'] / 1024:.2f} KB")
 
     def yannakakis(self, relations, join_tree, selection_criteria, projection_criteria):
 
-        startTime = curTime = time.time()
-        self.logger.info(f"Program Started at : {startTime:.6f} seconds")
-
-        # Apply selections
-        for table_name, conditions in selection_criteria.items():
-            relations[table_name] = self.apply_selection(relations[table_name], conditions)
-
-        curTime = self.calculateTimeInterval(curTime, "Time taken to Selections :- ")
+        profiler = self.profiler
+        profiler.start()
+        self.logger.info(f"Program Started at : {time.time():.6f} seconds")
+
+        with profiler.phase("selection", "Time taken to Selections :- "):
+            # Work on a copy so the caller's relations can be reused for other plans
+            relations = dict(relations)
+
+            # Mixed inputs are unified on the columnar representation
+            if any(isinstance(rel, ColumnarRelation) for rel in relations.values()):
+                # Empty lists of rows keep the columns the query reads
+                columns = query_columns(join_tree, selection_criteria, projection_criteria)
+                for table_name, rel in relations.items():
+                    relations[table_name] = as_columnar(rel, columns.get(table_name))
+                # Key indexes are built once and shared by all phases
+                self.indexes = IndexRegistry()
+
+            # Apply selections
+            for table_name, conditions in selection_criteria.items():
+                relations[table_name] = self.apply_selection(relations[table_name], conditions)
+
+            # Join keys are compared as compact fixed-width codes from here on
+            if self.indexes is not None:
+                relations = encode_join_keys(relations, join_tree)
         self.measure_memory(relations, "Memory Usage After Selections")
 
-        # Decide join order based on cardinality
-        if self.cardinalityEstimation:
-            join_tree = self.decide_join_order(relations, join_tree)
-
-        curTime = self.calculateTimeInterval(curTime, "Time taken to calculate join order :- ")
-
-        # Phase 1: Bottom-Up Semi-Join Reduction
-        reduced = self.bottom_up_semi_join(relations, join_tree)
-
-        curTime = self.calculateTimeInterval(curTime, "Time taken to calculate perform bottom up semi join :- ")
-        self.measure_memory(reduced, "Memory Usage After Bottom-Up Semi-Join")
-
-        # Phase 2: Top-Down Semi-Join Reduction
-        reduced = self.top_down_semi_join(reduced, join_tree)
-
-        curTime = self.calculateTimeInterval(curTime, "Time taken to calculate perform top down semi join :- ")
-        self.measure_memory(reduced, "Memory Usage After Top-Down Semi-Join")
+        with profiler.phase("join_order", "Time taken to calculate join order :- "):
+            # Build a rooted join tree from the join predicates (GYO reduction)
+            join_tree = build_join_tree(join_tree)
+
+            # Decide join order based on cardinality
+            if self.cardinalityEstimation:
+                join_tree = self.decide_join_order(relations, join_tree)
+            self.logger.info(f"Join tree :- {join_tree}")
+
+        # COUNT(*)/MIN/MAX are folded bottom-up, the join itself is never built
+        aggregateOnly = self.aggregatePushdown and is_aggregate_query(projection_criteria)
+
+        # Approximate-first mode: both passes on Bloom filters, then one exact bottom-up
+        # pass. The join and aggregate phases match keys exactly, so the few false
+        # positives left in the lower tables never reach the result.
+        approximateFirst = self.bloomFilter and self.indexes is not None
+
+        # Independent subtrees are reduced concurrently when workers are given
+        if self.workers and self.workers > 1:
+            self.reducer = ParallelReducer(self.reduce_relation, self.logger, self.workers, profiler=profiler)
+        try:
+            if approximateFirst:
+                with profiler.phase("bloom_semi_join", "Time taken to perform Bloom filter semi joins :- "):
+                    self.approximate = True
+                    reduced = self.bottom_up_semi_join(relations, join_tree)
+                    if not aggregateOnly:
+                        reduced = self.top_down_semi_join(reduced, join_tree)
+                    self.approximate = False
+                    relations = reduced
+                self.measure_memory(reduced, "Memory Usage After Bloom Filter Semi-Joins")
+
+            # Phase 1: Bottom-Up Semi-Join Reduction
+            with profiler.phase("bottom_up", "Time taken to calculate perform bottom up semi join :- "):
+                reduced = self.bottom_up_semi_join(relations, join_tree)
+            self.measure_memory(reduced, "Memory Usage After Bottom-Up Semi-Join")
+
+            # Phase 2: Top-Down Semi-Join Reduction (not needed to aggregate, nor after the Bloom passes)
+            if not aggregateOnly and not approximateFirst:
+                with profiler.phase("top_down", "Time taken to calculate perform top down semi join :- "):
+                    reduced = self.top_down_semi_join(reduced, join_tree)
+                self.measure_memory(reduced, "Memory Usage After Top-Down Semi-Join")
+        finally:
+            # The worker processes are released even when a semi-join fails
+            if self.reducer is not None:
+                self.reducer.close()
+                self.reducer = None
 
         # Phase 3: Final Join Phase
-        result = self.join_phase(reduced, join_tree)
-
-        curTime = self.calculateTimeInterval(curTime, "Time taken to calculate perform join phase :- ")
-        self.logger.info(f"Final Result - Memory Usage (Before Projection): {sys.getsizeof(result) / 1024:.2f} KB")
+        with profiler.phase("aggregate" if aggregateOnly else "join", "Time taken to calculate perform join phase :- "):
+            if aggregateOnly:
+                result = aggregate_phase(reduced, join_tree, projection_criteria, self.indexes)
+                self.logger.info(f"Aggregates :- {result[0]}")
+            else:
+                result = self.join_phase(reduced, join_tree, projection_criteria)
 
-        # Apply projections
-        # for table_name, columns in projection_criteria.items():
-        #     if table_name in result[0]:  # Only apply projection to present tables
-        #         result = apply_projection(result, columns)
+        if self.indexes is not None:
+            self.logger.info(f"Key indexes built :- {self.indexes.builds}  reused :- {self.indexes.reuses}")
 
-        curTime = self.calculateTimeInterval(curTime, "Time taken to perform projections :- ")
-        endTime = self.calculateTimeInterval(startTime, "Overall time taken by Yannakakis algirithm :- ")
+        # Dictionary-encoded columns are only decoded for the final result
+        with profiler.phase("decode", "Time taken to perform projections :- "):
+            if isinstance(result, ColumnarRelation):
+                result = result.decode()
 
-        self.logger.info(f"Program ends at : {endTime:.6f} seconds")
+        self.timeTaken = profiler.stop()
+        self.logger.info(f"Overall time taken by Yannakakis algirithm :-  {self.timeTaken:.6f} seconds")
+        self.logger.info(f"Program ends at : {time.time():.6f} seconds")
 
-        self.logger.info(f"Final Result - Memory Usage (After Projection): {sys.getsizeof(result) / 1024:.2f} KB")
+        self.measure_memory({"result": result}, "Final Result")
         self.logger.info(f"Length of Final Join : {len(result)}")
         return result